@@ -0,0 +1,322 @@
+"""Modulo de benchmarks.
+
+Ejecuta cada algoritmo registrado en main.py sobre un conjunto de instancias
+y con varias semillas, y guarda por cada ejecucion el largo del tour, el
+tiempo (de reloj y de CPU), las iteraciones, las iteraciones por segundo y
+la diferencia porcentual (gap) con el optimo conocido de la instancia y con
+una cota inferior del optimo (bound_gap, ver main.lower_bound()). Si
+no se conoce el optimo y la instancia es chica, se calcula con un algoritmo
+exacto: Held-Karp (search.HeldKarp) o, para instancias medianas, branch and
+bound (search.BranchAndBound, que solo lo informa si termina). Con
+--stats tambien guarda los sucesores evaluados, las evaluaciones por
+segundo y el tiempo de evaluacion (ver el modulo stats), y con --memory el
+pico de memoria.
+
+Los resultados se pueden guardar en JSON y en CSV. Con --baseline se
+comparan con los de una version anterior (un JSON generado por este mismo
+modulo) y se informan como regresiones las ejecuciones que dan un tour mas
+largo o que tardan mas de lo tolerado. En ese caso el programa termina con
+codigo 1, para poder usarlo en integracion continua.
+
+Ejemplo:
+    python benchmark.py -s 0 1 2 -t 5 -o base.json
+    python benchmark.py -s 0 1 2 -t 5 -b base.json
+"""
+
+import csv
+import json
+import os
+import platform
+import random
+import sys
+from datetime import datetime, timezone
+import numpy as np
+import load
+import main
+import parse
+import problem
+import search
+
+# Directorio de instancias por defecto
+INSTANCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instances")
+
+# Largo de los tours optimos conocidos (TSPLIB)
+OPTIMA = {"burma14": 3323, "ulysses16": 6859, "att48": 10628,
+          "berlin52": 7542, "pr76": 108159}
+
+# Columnas de los resultados, en el orden del CSV
+FIELDS = ["instance", "n", "algorithm", "seed", "length", "optimum", "gap",
+          "lower_bound", "bound_gap", "time", "cpu_time", "iters", "iters_per_sec", "evaluations",
+          "evals_per_sec", "eval_time", "peak_memory"]
+
+# Tiempo maximo (en segundos) de branch and bound al calcular un optimo
+EXACT_TIME = 60.0
+
+# Diferencia minima de tiempo (en segundos) para informar una regresion
+MIN_TIME_DIFF = 0.05
+
+
+def find_instances(paths: list[str]) -> list[str]:
+    """Determina los archivos ".tsp" a ejecutar.
+
+    Argumentos:
+    ==========
+    paths: list[str]
+        archivos o directorios; de los directorios se toman todos los ".tsp"
+
+    Retorno:
+    =======
+    files: list[str]
+        archivos ".tsp", ordenados por nombre dentro de cada directorio
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, f) for f in sorted(os.listdir(path))
+                         if f.endswith(".tsp"))
+        else:
+            files.append(path)
+    return files
+
+
+def run_benchmark(files: list[str], algo_names: list[str], seeds: list[int],
+                  time_limit: float | None = None, k: int | None = None,
+                  optima: dict[str, float] | None = None,
+                  stats: bool = False, init: str = "identity",
+                  restart: str | None = None,
+                  memory: bool = False) -> list[dict]:
+    """Ejecuta cada algoritmo sobre cada instancia con cada semilla.
+
+    Cada ejecucion usa una instancia nueva del algoritmo y arranca con el
+    generador de numeros al azar de python inicializado con la semilla, de
+    modo que sus resultados son reproducibles (salvo que se agote el tiempo).
+
+    Argumentos:
+    ==========
+    files: list[str]
+        archivos ".tsp"
+    algo_names: list[str]
+        nombres de los algoritmos (ver main.ALGO_NAMES)
+    seeds: list[int]
+        semillas
+    time_limit: float | None
+        tiempo maximo de cada ejecucion en segundos
+    k: int | None
+        tamaño de las listas de candidatos del TSP
+    optima: dict[str, float] | None
+        largo optimo de cada instancia, por nombre (por defecto, OPTIMA). Si
+        falta el de una instancia chica, se calcula con exact_optimum().
+    stats: bool
+        si es True se resuelve con algo.profile() y se guardan las
+        estadisticas; si no, esas columnas quedan en None
+    init: str
+        estado inicial del TSP (ver problem.TSP)
+    restart: str | None
+        generador de los reinicios de hill_reset (ver main.make_algos)
+    memory: bool
+        si es True tambien se mide el pico de memoria de cada ejecucion
+        (implica stats)
+
+    Retorno:
+    =======
+    records: list[dict]
+        un diccionario por ejecucion, con las claves de FIELDS
+    """
+    optima = OPTIMA if optima is None else optima
+    records = []
+    for filename in files:
+        name = os.path.splitext(os.path.basename(filename))[0]
+        dist, coords = load.read_instance(filename)
+        p = problem.TSP(dist, coords=coords, k=k, init=init)
+        optimum = optima.get(name)
+        if optimum is None:
+            optimum = exact_optimum(p, name)
+        first = len(records)
+        solved = []
+        for seed in seeds:
+            algos = main.make_algos(time_limit=time_limit, seed=seed,
+                                    restart=restart, n=p.n)
+            for algo_name in algo_names:
+                if algo_name not in algos:
+                    continue  # exactos en instancias grandes
+                algo = algos[algo_name]
+                random.seed(seed)
+                main.run(algo, p, stats, memory)
+                solved.append(algo)
+                length = -algo.value
+                st = algo.stats if stats or memory else None
+                records.append({
+                    "instance": name,
+                    "n": p.n,
+                    "algorithm": algo_name,
+                    "seed": seed,
+                    "length": length,
+                    "optimum": optimum,
+                    "gap": gap(length, optimum),
+                    "lower_bound": None,
+                    "bound_gap": None,
+                    "time": algo.time,
+                    "cpu_time": algo.cpu_time,
+                    "iters": algo.niters,
+                    "iters_per_sec": algo.niters / algo.time if algo.time > 0 else None,
+                    "evaluations": st.evaluations if st else None,
+                    "evals_per_sec": st.evals_per_sec if st else None,
+                    "eval_time": st.eval_time if st else None,
+                    "peak_memory": st.peak_memory if st else None,
+                })
+                print(name, algo_name, seed, length, "%.3f" % algo.time,
+                      algo.niters, sep="\t", flush=True)
+
+        # La cota usa el mejor tour de todas las ejecuciones de la instancia
+        if solved:
+            bound = main.lower_bound(p, solved)
+            print(name, "cota inferior", bound, sep="\t", flush=True)
+            for r in records[first:]:
+                r["lower_bound"] = bound
+                r["bound_gap"] = main.bound_gap(r["length"], bound)
+    return records
+
+
+def exact_optimum(p: problem.TSP, name: str) -> float | None:
+    """Calcula el largo optimo de una instancia chica o mediana.
+
+    Usa HeldKarp hasta HeldKarp.MAX_N ciudades y BranchAndBound (con
+    EXACT_TIME segundos) hasta BranchAndBound.MAX_N. Retorna None si la
+    instancia es mas grande o si no se llego a demostrar el optimo.
+    """
+    if p.n <= search.HeldKarp.MAX_N:
+        exact = search.HeldKarp()
+    elif p.n <= search.BranchAndBound.MAX_N:
+        exact = search.BranchAndBound(max_time=EXACT_TIME)
+    else:
+        return None
+    exact.solve(p)
+    if not exact.optimal:
+        print(name, "optimo sin demostrar", -exact.value, "%.3f" % exact.time,
+              sep="\t", flush=True)
+        return None
+    print(name, "optimo", -exact.value, "%.3f" % exact.time, sep="\t", flush=True)
+    return -exact.value
+
+
+def gap(length: float, optimum: float | None) -> float | None:
+    """Diferencia porcentual entre un largo y el optimo (None si no se conoce)."""
+    if optimum is None:
+        return None
+    return 100 * (length - optimum) / optimum
+
+
+def mean(runs: list[dict], field: str) -> str:
+    """Promedio de un campo en las ejecuciones que lo tienen, formateado ("-" si ninguna)."""
+    values = [r[field] for r in runs if r[field] is not None]
+    return "%.2f" % (sum(values) / len(values)) if values else "-"
+
+
+def compare(records: list[dict], baseline: list[dict],
+            tolerance: float = 0.2) -> list[str]:
+    """Compara los resultados con los de una version anterior.
+
+    Las ejecuciones se emparejan por instancia, algoritmo y semilla. Una
+    ejecucion es una regresion si da un tour mas largo que en baseline o si
+    tarda mas de (1 + tolerance) veces lo que tardaba (y al menos
+    MIN_TIME_DIFF segundos mas).
+
+    Argumentos:
+    ==========
+    records: list[dict]
+        resultados actuales
+    baseline: list[dict]
+        resultados de referencia
+    tolerance: float
+        aumento relativo de tiempo tolerado
+
+    Retorno:
+    =======
+    regressions: list[str]
+        descripcion de cada regresion encontrada
+    """
+    base = {(r["instance"], r["algorithm"], r["seed"]): r for r in baseline}
+    regressions = []
+    for r in records:
+        old = base.get((r["instance"], r["algorithm"], r["seed"]))
+        if old is None:
+            continue
+        run = f'{r["instance"]} {r["algorithm"]} seed={r["seed"]}'
+        if r["length"] > old["length"]:
+            regressions.append(f'{run}: largo {old["length"]} -> {r["length"]}')
+        if (r["time"] > (1 + tolerance) * old["time"]
+                and r["time"] - old["time"] >= MIN_TIME_DIFF):
+            regressions.append(f'{run}: tiempo {old["time"]:.3f}s -> {r["time"]:.3f}s')
+    return regressions
+
+
+def write_json(records: list[dict], filename: str, meta: dict) -> None:
+    """Guarda los resultados (y los datos de la ejecucion) en un archivo JSON."""
+    with open(filename, "w") as f:
+        json.dump({"meta": meta, "results": records}, f, indent=1)
+
+
+def read_json(filename: str) -> list[dict]:
+    """Lee los resultados de un archivo JSON generado por write_json()."""
+    with open(filename) as f:
+        return json.load(f)["results"]
+
+
+def write_csv(records: list[dict], filename: str) -> None:
+    """Guarda los resultados en un archivo CSV, con una columna por campo de FIELDS."""
+    with open(filename, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(records)
+
+
+def benchmark() -> int:
+    """Funcion principal. Retorna el codigo de salida del programa."""
+    args = parse.parse_benchmark(main.ALGO_NAMES)
+
+    optima = dict(OPTIMA)
+    if args.optima is not None:
+        with open(args.optima) as f:
+            optima.update(json.load(f))
+
+    files = find_instances(args.paths or [INSTANCES_DIR])
+    records = run_benchmark(files, args.algorithms, args.seeds,
+                            args.time_limit, args.neighbours, optima, args.stats,
+                            args.init, args.restart, args.memory)
+
+    meta = {"date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "seeds": args.seeds,
+            "time_limit": args.time_limit,
+            "neighbours": args.neighbours,
+            "init": args.init,
+            "restart": args.restart,
+            "stats": args.stats,
+            "memory": args.memory}
+    if args.output is not None:
+        write_json(records, args.output, meta)
+    if args.csv is not None:
+        write_csv(records, args.csv)
+
+    # Resumen por algoritmo: gap promedio (con el optimo y con la cota) y
+    # tiempo total
+    print("Gap %:", "Gap cota %:", "Tiempo:", "Algoritmo:", sep="\t\t")
+    for algo_name in args.algorithms:
+        runs = [r for r in records if r["algorithm"] == algo_name]
+        print(mean(runs, "gap"), mean(runs, "bound_gap"),
+              "%.2f" % sum(r["time"] for r in runs), algo_name, sep="\t\t")
+
+    if args.baseline is not None:
+        regressions = compare(records, read_json(args.baseline), args.tolerance)
+        for line in regressions:
+            print("REGRESION", line, sep="\t")
+        if regressions:
+            return 1
+        print("Sin regresiones respecto de", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(benchmark())
@@ -0,0 +1,318 @@
+"""Este modulo calcula cotas inferiores del largo del tour optimo del TSP.
+
+Un 1-arbol es un arbol generador de las ciudades 1,...,n-1 mas dos aristas
+que unen a la ciudad 0 con el arbol. Todo tour es un 1-arbol, por lo que
+el 1-arbol minimo es una cota inferior del tour optimo. La cota mejora
+sumando un potencial pi[v] al costo de las aristas de cada ciudad: el largo
+de un tour no cambia salvo por la constante 2 * sum(pi), pero el 1-arbol
+minimo si, y la cota (1-arbol minimo) - 2 * sum(pi) es valida para todo
+pi. held_karp_bound() busca el pi que la maximiza con el metodo del
+subgradiente (cota de Held-Karp); si el 1-arbol resultante es un tour,
+es optimo.
+
+Las funciones reciben la matriz densa de distancias (float64) y, si se
+usan dentro de un branch and bound, una matriz fixed con las aristas
+obligatorias (1) y prohibidas (-1) de cada nodo.
+
+Para acotar el gap de cualquier solucion, mst_bound(), one_tree_bound() y
+lower_bound() reciben en cambio el backend de distancias del problema
+(DistanceMatrix o LazyDistance). El arbol generador minimo es una cota
+mas debil (todo tour sin una arista es un arbol generador) pero no
+necesita la matriz densa, por lo que sirve para instancias mas grandes.
+
+Requiere del paquete numpy.
+"""
+
+from __future__ import annotations
+import numpy as np
+
+# Costo con el que se fuerza una arista obligatoria en el arbol
+FORCED = -1e18
+
+# Iteraciones del subgradiente sin mejorar la cota antes de achicar el paso
+PATIENCE = 10
+
+# Iteraciones del subgradiente de one_tree_bound() por defecto
+BOUND_ITERS = 100
+
+# Cantidad maxima de ciudades de lower_bound() con el 1-arbol (usa matrices
+# densas de n x n en cada iteracion) y con el arbol generador minimo
+ONE_TREE_MAX_N = 1000
+MST_MAX_N = 20000
+
+
+def minimum_spanning_tree(cost: np.ndarray) -> np.ndarray | None:
+    """Arbol generador minimo de una matriz de costos (algoritmo de Prim).
+
+    Argumentos:
+    ==========
+    cost: np.ndarray
+        matriz simetrica (m, m) de costos; np.inf indica que no hay arista
+
+    Retorno:
+    =======
+    parent: np.ndarray | None
+        arreglo (m,) con el padre de cada nodo en el arbol con raiz 0
+        (parent[0] = -1), o None si el grafo no es conexo
+    """
+    m = len(cost)
+    parent = np.empty(m, dtype=np.int64)
+    parent[0] = -1
+    # Nodos fuera del arbol, su costo minimo al arbol y el nodo que lo da;
+    # los primeros size son los que faltan agregar
+    rest = np.arange(1, m)
+    best = cost[0, 1:].copy()
+    near = np.zeros(m - 1, dtype=np.int64)
+    for size in range(m - 1, 0, -1):
+        i = best[:size].argmin()
+        if best[i] == np.inf:
+            return None
+        v = rest[i]
+        parent[v] = near[i]
+        last = size - 1
+        rest[i], best[i], near[i] = rest[last], best[last], near[last]
+        row = cost[v, rest[:last]]
+        closer = row < best[:last]
+        best[:last][closer] = row[closer]
+        near[:last][closer] = v
+    return parent
+
+
+def one_tree(cost: np.ndarray) -> np.ndarray | None:
+    """1-arbol minimo de una matriz de costos.
+
+    Argumentos:
+    ==========
+    cost: np.ndarray
+        matriz simetrica (n, n) de costos; np.inf indica que no hay arista
+
+    Retorno:
+    =======
+    edges: np.ndarray | None
+        matriz (n, 2) con las aristas del 1-arbol (las dos primeras son las
+        de la ciudad 0), o None si no existe
+    """
+    n = len(cost)
+    parent = minimum_spanning_tree(cost[1:, 1:])
+    if parent is None:
+        return None
+    nearest = np.argsort(cost[0, 1:], kind='stable')[:2] + 1
+    if cost[0, nearest[-1]] == np.inf:
+        return None
+    edges = np.empty((n, 2), dtype=np.int64)
+    edges[:2, 0] = 0
+    edges[:2, 1] = nearest
+    edges[2:, 0] = np.arange(2, n)
+    edges[2:, 1] = parent[1:] + 1
+    return edges
+
+
+def held_karp_bound(dist: np.ndarray, upper: float, pi: np.ndarray | None = None,
+                    iters: int = 100, step: float = 2.0,
+                    fixed: np.ndarray | None = None
+                    ) -> tuple[float, np.ndarray, np.ndarray | None]:
+    """Cota de Held-Karp: 1-arbol minimo con potenciales, por subgradiente.
+
+    En cada iteracion se calcula el 1-arbol minimo con costos
+    dist[u][v] + pi[u] + pi[v] y se mueve pi en la direccion (grado - 2),
+    con paso step * (upper - cota) / |grado - 2|^2. El paso se divide por
+    dos cada PATIENCE iteraciones sin mejorar la cota.
+
+    Argumentos:
+    ==========
+    dist: np.ndarray
+        matriz (n, n) de distancias
+    upper: float
+        largo de un tour conocido; se detiene si la cota lo alcanza
+    pi: np.ndarray | None
+        potenciales iniciales (por defecto, ceros)
+    iters: int
+        cantidad maxima de iteraciones
+    step: float
+        factor inicial del paso
+    fixed: np.ndarray | None
+        matriz (n, n) de int8 con 1 en las aristas obligatorias y -1 en las
+        prohibidas
+
+    Retorno:
+    =======
+    bound: float
+        mejor cota encontrada (np.inf si no hay ningun tour que respete
+        fixed). Si el 1-arbol es un tour, es su largo.
+    pi: np.ndarray
+        potenciales de la mejor cota
+    edges: np.ndarray | None
+        1-arbol de la mejor cota
+    """
+    n = len(dist)
+    pi = np.zeros(n) if pi is None else pi.copy()
+    best, best_pi, best_edges = -np.inf, pi, None
+    stall = 0
+    for _ in range(iters):
+        cost = dist + pi[:, None]
+        cost += pi[None, :]
+        if fixed is not None:
+            cost[fixed == 1] = FORCED
+            cost[fixed == -1] = np.inf
+        np.fill_diagonal(cost, np.inf)
+        edges = one_tree(cost)
+        if edges is None:
+            return np.inf, pi, None
+        g = np.bincount(edges.ravel(), minlength=n) - 2
+        bound = dist[edges[:, 0], edges[:, 1]].sum() + g @ pi
+        if bound > best:
+            best, best_pi, best_edges = bound, pi.copy(), edges
+            stall = 0
+        else:
+            stall += 1
+        if not g.any() or bound >= upper:
+            break
+        if stall >= PATIENCE:
+            step /= 2
+            stall = 0
+            if step < 1e-4:
+                break
+        pi = pi + step * (upper - bound) / (g @ g) * g
+    return best, best_pi, best_edges
+
+
+def eliminable_edges(dist: np.ndarray, pi: np.ndarray, edges: np.ndarray,
+                     bound: float, upper: float) -> np.ndarray:
+    """Aristas que no pueden estar en ningun tour de largo menor a upper.
+
+    Agregar una arista (u, v) que no esta en el 1-arbol obliga a quitar la
+    arista mas cara del camino entre u y v en el arbol (o, si u = 0, la mas
+    cara de las dos aristas de 0). Si la cota resultante alcanza upper, la
+    arista se puede descartar (eliminacion por costo reducido).
+
+    Argumentos:
+    ==========
+    dist: np.ndarray
+        matriz (n, n) de distancias
+    pi, edges, bound:
+        potenciales, 1-arbol y cota devueltos por held_karp_bound()
+    upper: float
+        largo del mejor tour conocido
+
+    Retorno:
+    =======
+    remove: np.ndarray
+        matriz (n, n) de booleanos, simetrica, con las aristas descartables
+    """
+    n = len(dist)
+    cost = dist + pi[:, None] + pi[None, :]
+    adj = [[] for _ in range(n)]
+    for u, v in edges[2:].tolist():
+        adj[u].append(v)
+        adj[v].append(u)
+
+    # heaviest[u][v] = arista mas cara del camino entre u y v en el arbol
+    heaviest = np.full((n, n), -np.inf)
+    for root in range(1, n):
+        row = heaviest[root]
+        stack = [root]
+        seen = {root}
+        while stack:
+            u = stack.pop()
+            for v in adj[u]:
+                if v not in seen:
+                    seen.add(v)
+                    row[v] = max(row[u], cost[u, v])
+                    stack.append(v)
+    heaviest[0, 1:] = cost[0, edges[:2, 1]].max()
+    heaviest[1:, 0] = heaviest[0, 1:]
+
+    remove = bound + cost - heaviest >= upper
+    remove[edges[:, 0], edges[:, 1]] = False
+    remove[edges[:, 1], edges[:, 0]] = False
+    np.fill_diagonal(remove, False)
+    return remove
+
+
+def mst_bound(dist) -> float:
+    """Peso del arbol generador minimo de todas las ciudades (algoritmo de Prim).
+
+    Es una cota inferior del largo del tour optimo. Las distancias de cada
+    ciudad que se agrega al arbol se piden al backend de a una fila, asi
+    que no hace falta la matriz densa.
+
+    Argumentos:
+    ==========
+    dist: DistanceMatrix | LazyDistance
+        backend de distancias del problema
+
+    Retorno:
+    =======
+    bound: float
+        peso del arbol
+    """
+    n = dist.n
+    rest = np.arange(1, n)
+    best = dist.pairs(0, rest).astype(np.float64)
+    total = 0.0
+    for size in range(n - 1, 0, -1):
+        i = best[:size].argmin()
+        total += best[i]
+        v = rest[i]
+        last = size - 1
+        rest[i], best[i] = rest[last], best[last]
+        best[:last] = np.minimum(best[:last], dist.pairs(v, rest[:last]))
+    return total
+
+
+def one_tree_bound(dist, upper: float, iters: int = BOUND_ITERS) -> float:
+    """Cota de Held-Karp con pocas iteraciones del subgradiente.
+
+    Argumentos:
+    ==========
+    dist: DistanceMatrix | LazyDistance
+        backend de distancias del problema
+    upper: float
+        largo de un tour conocido (da el tamano del paso)
+    iters: int
+        iteraciones del subgradiente
+
+    Retorno:
+    =======
+    bound: float
+        cota inferior del largo del tour optimo (redondeada hacia arriba
+        si las distancias son enteras)
+    """
+    cities = np.arange(dist.n)
+    matrix = dist.pairs(cities[:, None], cities[None, :]).astype(np.float64)
+    bound = held_karp_bound(matrix, upper, iters=iters)[0]
+    if np.issubdtype(dist.dtype, np.integer):
+        bound = np.ceil(bound - 1e-6)
+    return float(bound)
+
+
+def lower_bound(dist, upper: float | None = None,
+                iters: int = BOUND_ITERS) -> float | None:
+    """Mejor cota inferior rapida del largo del tour optimo.
+
+    Usa one_tree_bound() si se conoce un tour (upper) y la instancia tiene
+    a lo sumo ONE_TREE_MAX_N ciudades, si no mst_bound() hasta MST_MAX_N
+    ciudades.
+
+    Argumentos:
+    ==========
+    dist: DistanceMatrix | LazyDistance
+        backend de distancias del problema
+    upper: float | None
+        largo del mejor tour conocido
+    iters: int
+        iteraciones del subgradiente del 1-arbol
+
+    Retorno:
+    =======
+    bound: float | None
+        la cota, o None si la instancia es demasiado grande
+    """
+    n = dist.n
+    if n < 3:
+        return upper
+    if upper is not None and n <= ONE_TREE_MAX_N:
+        return one_tree_bound(dist, upper, iters)
+    if n <= MST_MAX_N:
+        return mst_bound(dist)
+    return None
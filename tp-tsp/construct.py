@@ -0,0 +1,335 @@
+"""Este modulo define heuristicas de construccion de tours del TSP.
+
+Sirven para generar un estado inicial mejor que el tour identidad o un tour
+al azar, de modo que las busquedas locales arranquen cerca de un buen
+optimo local y necesiten muchas menos iteraciones. Tambien se pueden usar
+como generador de reinicios de HillClimbingReset (ver TSP.random_reset()).
+
+Las heuristicas disponibles (claves de CONSTRUCTIONS) son:
+
+* "nn": vecino mas cercano. Parte de una ciudad y va siempre a la ciudad
+no visitada mas cercana; primero la busca en la lista de candidatos y,
+solo si estan todos visitados, entre todas las ciudades que faltan (con
+el indice espacial del problema, si tiene coordenadas).
+
+* "greedy": aristas golosas. Recorre las aristas de las listas de
+candidatos de la mas corta a la mas larga y agrega cada una si no crea una
+ciudad de grado 3 ni un ciclo. Los fragmentos que quedan se unen por sus
+extremos mas cercanos.
+
+* "sfc": curva de Hilbert. Recorre las ciudades en el orden en que las
+visita la curva de Hilbert que cubre el rectangulo de las coordenadas.
+Es la mas rapida, pero requiere coordenadas.
+
+* "mst": duplicacion del arbol generador minimo. Recorre en preorden el
+arbol generador minimo del grafo de candidatos (el tour resultante mide
+a lo sumo el doble del optimo si el arbol es el del grafo completo).
+
+Todas las funciones reciben un TSP y devuelven un estado [0,...,0]. Si se
+pasa un generador rng, la construccion se aleatoriza (ciudad inicial,
+ruido en el largo de las aristas o rotacion de las coordenadas) para
+generar tours distintos en cada llamada; si no, es determinista.
+"""
+
+from __future__ import annotations
+import math
+import random
+import numpy as np
+
+# Largo de las listas de candidatos si el TSP no tiene (k es None)
+CANDIDATES = 10
+
+# Ruido relativo maximo en el largo de las aristas al aleatorizar
+NOISE = 0.1
+
+# Bits por coordenada de la curva de Hilbert
+HILBERT_ORDER = 16
+
+
+def nearest_neighbour(problem, rng: random.Random | None = None) -> list[int]:
+    """Construye un tour con la heuristica del vecino mas cercano.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        instancia del problema
+    rng: random.Random | None
+        si no es None, la ciudad inicial se elige al azar (si no, es la 0)
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado [0,...,0]
+    """
+    n = problem.n
+    neighbours = _candidates(problem)
+    current = 0 if rng is None else rng.randrange(n)
+    visited = np.zeros(n, dtype=bool)
+    visited[current] = True
+    order = [current]
+    for _ in range(n - 1):
+        for c in neighbours[current].tolist():
+            if not visited[c]:
+                current = c
+                break
+        else:
+            current = _nearest_unvisited(problem, current, visited)
+        visited[current] = True
+        order.append(current)
+    return _closed(order)
+
+
+def greedy_edge(problem, rng: random.Random | None = None) -> list[int]:
+    """Construye un tour con la heuristica de aristas golosas.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        instancia del problema
+    rng: random.Random | None
+        si no es None, el largo de cada arista se multiplica por un factor
+        al azar entre 1 y 1 + NOISE antes de ordenarlas
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado [0,...,0]
+    """
+    n = problem.n
+    u, v, w = _candidate_edges(problem, rng)
+    parent = list(range(n))
+    degree = [0] * n
+    adj = [[] for _ in range(n)]
+    for e in np.lexsort((v, u, w)).tolist():
+        a, b = int(u[e]), int(v[e])
+        if degree[a] == 2 or degree[b] == 2:
+            continue
+        ra, rb = _find(parent, a), _find(parent, b)
+        if ra == rb:
+            continue
+        parent[ra] = rb
+        degree[a] += 1
+        degree[b] += 1
+        adj[a].append(b)
+        adj[b].append(a)
+
+    # Cada componente es un camino; se recorre desde uno de sus extremos
+    seen = [False] * n
+    fragments = []
+    for s in range(n):
+        if seen[s] or degree[s] == 2:
+            continue
+        path = [s]
+        seen[s] = True
+        prev, cur = -1, s
+        while True:
+            nxt = [c for c in adj[cur] if c != prev]
+            if not nxt:
+                break
+            prev, cur = cur, nxt[0]
+            seen[cur] = True
+            path.append(cur)
+        fragments.append(path)
+    return _closed(_link_fragments(problem, fragments))
+
+
+def space_filling_curve(problem, rng: random.Random | None = None) -> list[int]:
+    """Construye un tour con el orden de la curva de Hilbert.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        instancia del problema, con coordenadas
+    rng: random.Random | None
+        si no es None, las coordenadas se rotan un angulo al azar antes de
+        calcular la curva
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado [0,...,0]
+
+    Lanza ValueError si el problema no tiene coordenadas.
+    """
+    if problem.coords is None:
+        raise ValueError("la curva de Hilbert requiere las coordenadas de las ciudades")
+    xy = problem.coords - problem.coords.mean(axis=0)
+    if rng is not None:
+        angle = rng.uniform(0, 2 * math.pi)
+        c, s = math.cos(angle), math.sin(angle)
+        xy = xy @ np.array([[c, s], [-s, c]])
+    xy = xy - xy.min(axis=0)
+    side = 1 << HILBERT_ORDER
+    scale = (side - 1) / max(xy.max(), 1e-12)
+    cells = (xy * scale).astype(np.int64)
+    index = _hilbert_index(cells[:, 0], cells[:, 1], side)
+    return _closed(np.argsort(index, kind='stable').tolist())
+
+
+def mst_doubling(problem, rng: random.Random | None = None) -> list[int]:
+    """Construye un tour recorriendo en preorden un arbol generador minimo.
+
+    El arbol se calcula con Kruskal sobre las aristas de las listas de
+    candidatos. Si ese grafo no es conexo, se recorre cada arbol por
+    separado y los caminos se unen por sus extremos mas cercanos.
+
+    Argumentos:
+    ==========
+    problem: TSP
+        instancia del problema
+    rng: random.Random | None
+        si no es None, la raiz se elige al azar y el largo de cada arista
+        se multiplica por un factor al azar entre 1 y 1 + NOISE
+
+    Retorno:
+    =======
+    state: list[int]
+        un estado [0,...,0]
+    """
+    n = problem.n
+    u, v, w = _candidate_edges(problem, rng)
+    parent = list(range(n))
+    adj = [[] for _ in range(n)]
+    for e in np.lexsort((v, u, w)).tolist():
+        a, b = int(u[e]), int(v[e])
+        ra, rb = _find(parent, a), _find(parent, b)
+        if ra != rb:
+            parent[ra] = rb
+            adj[a].append(b)
+            adj[b].append(a)
+
+    root = 0 if rng is None else rng.randrange(n)
+    seen = [False] * n
+    fragments = []
+    for s in [root] + list(range(n)):
+        if seen[s]:
+            continue
+        path = []
+        stack = [s]
+        seen[s] = True
+        while stack:
+            cur = stack.pop()
+            path.append(cur)
+            for c in reversed(adj[cur]):
+                if not seen[c]:
+                    seen[c] = True
+                    stack.append(c)
+        fragments.append(path)
+    return _closed(_link_fragments(problem, fragments))
+
+
+# Heuristicas de construccion disponibles, por nombre
+CONSTRUCTIONS = {"nn": nearest_neighbour, "greedy": greedy_edge,
+                 "sfc": space_filling_curve, "mst": mst_doubling}
+
+
+def construct(problem, method: str, rng: random.Random | None = None) -> list[int]:
+    """Construye un tour con la heuristica method (una clave de CONSTRUCTIONS)."""
+    if method not in CONSTRUCTIONS:
+        raise ValueError(f"heuristica de construccion desconocida: {method!r}")
+    return CONSTRUCTIONS[method](problem, rng)
+
+
+def _closed(order: list[int]) -> list[int]:
+    """Rota un orden de las ciudades para que empiece en 0 y agrega el regreso a 0."""
+    i = order.index(0)
+    state = order[i:] + order[:i]
+    state.append(0)
+    return state
+
+
+def _nearest_unvisited(problem, city: int, visited: np.ndarray) -> int:
+    """Ciudad no visitada mas cercana a city.
+
+    Con coordenadas se busca con el indice espacial (distancia euclidea,
+    como las listas de candidatos); si no, se recorren todas las ciudades
+    que faltan con la matriz de distancias.
+    """
+    if problem.index is not None:
+        near = problem.index.knn(problem.coords[city:city + 1], 1, mask=~visited)
+        return near.item(0, 0)
+    rest = np.flatnonzero(~visited)
+    d = problem.dist.pairs(city, rest)
+    return rest[np.argmin(d)].item()
+
+
+def _candidates(problem) -> np.ndarray:
+    """Listas de candidatos del problema (o calculadas con CANDIDATES vecinos)."""
+    if problem.neighbours is not None:
+        return problem.neighbours
+    return problem.nearest_neighbours(min(CANDIDATES, problem.n - 1))
+
+
+def _candidate_edges(problem, rng: random.Random | None) -> tuple[np.ndarray, ...]:
+    """Aristas (u, v) con u < v de las listas de candidatos y su largo.
+
+    Si rng no es None, los largos se multiplican por un factor al azar
+    entre 1 y 1 + NOISE.
+    """
+    neighbours = _candidates(problem)
+    n, k = neighbours.shape
+    a = np.repeat(np.arange(n, dtype=np.int64), k)
+    b = neighbours.ravel().astype(np.int64)
+    keys = np.unique(np.minimum(a, b) * n + np.maximum(a, b))
+    u, v = keys // n, keys % n
+    w = problem.dist.pairs(u, v).astype(np.float64)
+    if rng is not None:
+        noise = np.random.default_rng(rng.getrandbits(64))
+        w *= noise.uniform(1, 1 + NOISE, len(w))
+    return u, v, w
+
+
+def _find(parent: list[int], a: int) -> int:
+    """Raiz del conjunto de a en un union-find (con compresion de caminos)."""
+    root = a
+    while parent[root] != root:
+        root = parent[root]
+    while parent[a] != root:
+        parent[a], a = root, parent[a]
+    return root
+
+
+def _link_fragments(problem, fragments: list[list[int]]) -> list[int]:
+    """Une caminos en un unico orden de las ciudades.
+
+    Parte del primer camino y, desde su ultima ciudad, agrega el camino
+    restante con el extremo mas cercano (invertido si ese extremo es el
+    final).
+    """
+    order = list(fragments[0])
+    rest = fragments[1:]
+    if not rest:
+        return order
+    heads = np.array([f[0] for f in rest])
+    tails = np.array([f[-1] for f in rest])
+    alive = np.ones(len(rest), dtype=bool)
+    for _ in range(len(rest)):
+        live = np.flatnonzero(alive)
+        d_head = problem.dist.pairs(order[-1], heads[live])
+        d_tail = problem.dist.pairs(order[-1], tails[live])
+        i, j = np.argmin(d_head), np.argmin(d_tail)
+        if d_head[i] <= d_tail[j]:
+            f = live[i]
+            order.extend(rest[f])
+        else:
+            f = live[j]
+            order.extend(reversed(rest[f]))
+        alive[f] = False
+    return order
+
+
+def _hilbert_index(x: np.ndarray, y: np.ndarray, side: int) -> np.ndarray:
+    """Posicion de cada celda (x, y) en la curva de Hilbert de un cuadrado de side celdas."""
+    index = np.zeros(len(x), dtype=np.int64)
+    s = side >> 1
+    while s > 0:
+        rx = (x & s) > 0
+        ry = (y & s) > 0
+        index += s * s * ((3 * rx) ^ ry)
+        # Rotar el cuadrante para que la curva siga siendo continua
+        flip = rx & ~ry
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        x, y = np.where(ry, x, y), np.where(ry, y, x)
+        s >>= 1
+    return index
@@ -0,0 +1,365 @@
+"""Este modulo define los backends de distancias del TSP.
+
+Un backend de distancias responde todas las consultas de costo que hace
+problem.TSP. Las ciudades se enumeran del 0 al n-1 (a diferencia del grafo
+de networkx, donde se enumeran del 1 al n).
+
+Las clases que se encuentran en este modulo son:
+
+* DistanceMatrix: matriz densa de numpy construida una unica vez. Puede
+estar en un archivo ".npy" abierto con mmap (ver DistanceMatrix.open() y
+DistanceMatrix.share()): en ese caso los procesos auxiliares reabren el
+archivo en lugar de recibir una copia de la matriz, y todos comparten las
+mismas paginas de memoria.
+
+* LazyDistance: calcula las distancias a partir de las coordenadas cada
+vez que se consultan, sin guardar la matriz. Sirve para instancias cuya
+matriz no entra en memoria (conviene usarla con listas de candidatos).
+
+Ademas se definen las funciones de distancia de TSPLIB que usan las
+instancias incluidas (EUC_2D, CEIL_2D, ATT y GEO), vectorizadas con numpy
+y con las mismas reglas de redondeo que la especificacion de TSPLIB. Cada
+una recibe dos arreglos de coordenadas de forma (..., 2) (con
+broadcasting) y devuelve las distancias enteras en un arreglo int64.
+
+Requiere del paquete numpy.
+"""
+
+from __future__ import annotations
+import math
+import os
+import tempfile
+import weakref
+from collections import OrderedDict
+import numpy as np
+from networkx import Graph
+
+# Radio de la Tierra y valor de pi de la definicion de GEO en TSPLIB
+# (tsplib95 usa math.pi, por lo que algunas distancias GEO pueden diferir en 1)
+GEO_RADIUS = 6378.388
+GEO_PI = 3.141592
+
+
+def _nint(x: np.ndarray) -> np.ndarray:
+    """Redondeo al entero mas cercano de TSPLIB: (int) (x + 0.5)."""
+    return np.floor(x + 0.5).astype(np.int64)
+
+
+def _euclidean(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distancia euclidea sin redondear."""
+    dx = a[..., 0] - b[..., 0]
+    dy = a[..., 1] - b[..., 1]
+    return np.sqrt(dx * dx + dy * dy)
+
+
+def euc_2d(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distancia EUC_2D: euclidea redondeada al entero mas cercano."""
+    return _nint(_euclidean(a, b))
+
+
+def ceil_2d(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distancia CEIL_2D: euclidea redondeada hacia arriba."""
+    return np.ceil(_euclidean(a, b)).astype(np.int64)
+
+
+def att(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distancia ATT (pseudo-euclidea)."""
+    dx = a[..., 0] - b[..., 0]
+    dy = a[..., 1] - b[..., 1]
+    r = np.sqrt((dx * dx + dy * dy) / 10.0)
+    t = _nint(r)
+    return t + (t < r)
+
+
+def _geo_radians(c: np.ndarray) -> np.ndarray:
+    """Convierte coordenadas GEO (grados.minutos) a radianes."""
+    deg = np.trunc(c)
+    return GEO_PI * (deg + 5.0 * (c - deg) / 3.0) / 180.0
+
+
+def geo(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distancia GEO: distancia sobre la esfera terrestre, en kilometros."""
+    a = _geo_radians(a)
+    b = _geo_radians(b)
+    q1 = np.cos(a[..., 1] - b[..., 1])
+    q2 = np.cos(a[..., 0] - b[..., 0])
+    q3 = np.cos(a[..., 0] + b[..., 0])
+    d = GEO_RADIUS * np.arccos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0
+    return d.astype(np.int64)
+
+
+# Funciones de distancia por EDGE_WEIGHT_TYPE
+METRICS = {"EUC_2D": euc_2d, "CEIL_2D": ceil_2d, "ATT": att, "GEO": geo}
+
+
+def _euc_2d_item(a: list[float], b: list[float]) -> int:
+    """Version escalar de euc_2d."""
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    return math.floor(math.sqrt(dx * dx + dy * dy) + 0.5)
+
+
+def _ceil_2d_item(a: list[float], b: list[float]) -> int:
+    """Version escalar de ceil_2d."""
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    return math.ceil(math.sqrt(dx * dx + dy * dy))
+
+
+def _att_item(a: list[float], b: list[float]) -> int:
+    """Version escalar de att."""
+    dx = a[0] - b[0]
+    dy = a[1] - b[1]
+    r = math.sqrt((dx * dx + dy * dy) / 10.0)
+    t = math.floor(r + 0.5)
+    return t + 1 if t < r else t
+
+
+# Versiones escalares (con math, mucho mas rapidas que numpy para un par de
+# ciudades). Hacen las mismas operaciones de punto flotante que las
+# vectorizadas, asi que dan exactamente el mismo resultado. GEO no tiene
+# version escalar porque math.cos y np.cos pueden diferir en el ultimo bit.
+_ITEM_METRICS = {"EUC_2D": _euc_2d_item, "CEIL_2D": _ceil_2d_item, "ATT": _att_item}
+
+
+class DistanceMatrix:
+    """Backend de distancias basado en una matriz densa de numpy.
+
+    La matriz se indexa desde 0 y es de tipo int32 si todos los pesos
+    son enteros, o float64 en caso contrario.
+
+    Si la matriz se abrio desde un archivo (self.path no es None), al
+    serializar la instancia con pickle (por ejemplo para enviarla a otro
+    proceso) solo se guarda la ruta, y al deserializarla se vuelve a abrir
+    el archivo con mmap de solo lectura.
+    """
+
+    def __init__(self, matrix: np.ndarray, path: str | None = None) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        matrix: np.ndarray
+            matriz cuadrada de distancias, indexada desde 0
+        path: str | None
+            archivo ".npy" que contiene la matriz, si matrix es su mmap
+        """
+        self.matrix = matrix
+        self.n = matrix.shape[0]
+        self.path = path
+
+    @classmethod
+    def open(cls, path: str) -> DistanceMatrix:
+        """Abre una matriz guardada con np.save(), con mmap de solo lectura.
+
+        Argumentos:
+        ==========
+        path: str
+            archivo ".npy" con la matriz de distancias
+
+        Retorno:
+        =======
+        dist: DistanceMatrix
+            backend con la matriz; se comparte entre procesos por su ruta
+        """
+        return cls(np.load(path, mmap_mode='r'), path)
+
+    def share(self, path: str | None = None) -> DistanceMatrix:
+        """Devuelve un backend con la misma matriz guardada en un archivo.
+
+        Si la matriz ya esta en un archivo se devuelve la misma instancia.
+        Si no, se guarda en path (o en un archivo temporal, que se borra
+        cuando se libera el backend devuelto) y se abre con mmap. Conviene
+        llamarlo antes de repartir el problema entre varios procesos.
+
+        Argumentos:
+        ==========
+        path: str | None
+            archivo ".npy" donde guardar la matriz
+
+        Retorno:
+        =======
+        dist: DistanceMatrix
+            backend con la matriz en un archivo
+        """
+        if self.path is not None:
+            return self
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="tsp-", suffix=".npy")
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, self.matrix)
+            dist = self.open(path)
+            dist._finalizer = weakref.finalize(dist, os.remove, path)
+            return dist
+        np.save(path, self.matrix)
+        return self.open(path)
+
+    def __getstate__(self) -> dict:
+        """Estado para pickle: solo la ruta si la matriz esta en un archivo."""
+        state = self.__dict__.copy()
+        # El archivo temporal lo borra solo el proceso que lo creo
+        state.pop("_finalizer", None)
+        if self.path is not None:
+            del state["matrix"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restaura el estado, reabriendo el archivo de la matriz si hace falta."""
+        self.__dict__.update(state)
+        if "matrix" not in state:
+            self.matrix = np.load(self.path, mmap_mode='r')
+
+    @classmethod
+    def from_graph(cls, G: Graph) -> DistanceMatrix:
+        """Construye la matriz a partir del grafo de networkx.
+
+        Argumentos:
+        ==========
+        G: Graph
+            grafo con los datos del problema. Sus nodos (del 1 al n, o del 0
+            al n-1 en algunas instancias EXPLICIT) se enumeran desde 0 en el
+            orden en que aparecen ordenados
+
+        Retorno:
+        =======
+        dist: DistanceMatrix
+            backend con la matriz de distancias
+        """
+        nodes = sorted(G.nodes)
+        weights = [[G[u][v]['weight'] if u != v else 0 for v in nodes]
+                   for u in nodes]
+        if all(isinstance(w, int) for row in weights for w in row):
+            dtype = np.int32
+        else:
+            dtype = np.float64
+        return cls(np.array(weights, dtype=dtype))
+
+    @classmethod
+    def from_coords(cls, coords: np.ndarray, metric: str) -> DistanceMatrix:
+        """Construye la matriz a partir de las coordenadas de las ciudades.
+
+        La matriz se calcula por bloques de filas, para acotar la memoria
+        auxiliar, y se guarda en int32 salvo que alguna distancia no entre.
+
+        Argumentos:
+        ==========
+        coords: np.ndarray
+            matriz (n, 2) con las coordenadas de cada ciudad
+        metric: str
+            tipo de distancia de TSPLIB (una clave de METRICS)
+
+        Retorno:
+        =======
+        dist: DistanceMatrix
+            backend con la matriz de distancias
+        """
+        func = METRICS[metric]
+        n = len(coords)
+        matrix = np.empty((n, n), dtype=np.int32)
+        rows = max(1, (1 << 20) // n)  # filas por bloque
+        for start in range(0, n, rows):
+            block = func(coords[start:start + rows, None, :], coords[None, :, :])
+            if matrix.dtype == np.int32 and block.max() > np.iinfo(np.int32).max:
+                matrix = matrix.astype(np.int64)
+            matrix[start:start + len(block)] = block
+        np.fill_diagonal(matrix, 0)
+        return cls(matrix)
+
+    def item(self, u: int, v: int) -> float:
+        """Distancia entre las ciudades u y v como escalar de Python."""
+        return self.matrix.item(u, v)
+
+    def pairs(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Distancias entre arreglos de ciudades (con broadcasting).
+
+        Los valores se devuelven en int64 o float64 para que las sumas
+        no desborden.
+        """
+        return self.matrix[u, v].astype(self.dtype, copy=False)
+
+    @property
+    def dtype(self) -> type:
+        """Tipo de dato en el que se acumulan las distancias."""
+        return np.int64 if self.matrix.dtype.kind == 'i' else np.float64
+
+    def tour_length(self, tour: list[int]) -> float:
+        """Longitud de un tour cerrado [v_0,...,v_n] con v_n = v_0."""
+        t = np.asarray(tour)
+        return self.pairs(t[:-1], t[1:]).sum().item()
+
+
+class LazyDistance:
+    """Backend de distancias que las calcula a partir de las coordenadas.
+
+    No guarda la matriz de distancias: cada consulta se calcula con la
+    funcion de TSPLIB de la instancia, de forma vectorizada en pairs() y
+    con math en item(). Opcionalmente guarda las filas completas usadas
+    mas recientemente (cache LRU de cache_rows filas), lo que conviene
+    cuando se consultan muchas veces las distancias desde las mismas
+    ciudades; calcular una fila cuesta O(n).
+
+    Responde las mismas consultas que DistanceMatrix (item, pairs, dtype y
+    tour_length), con los mismos resultados.
+    """
+
+    def __init__(self, coords: np.ndarray, metric: str, cache_rows: int = 0) -> None:
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        coords: np.ndarray
+            matriz (n, 2) con las coordenadas de cada ciudad, indexada desde 0
+        metric: str
+            tipo de distancia de TSPLIB (una clave de METRICS)
+        cache_rows: int
+            cantidad de filas que se guardan en el cache (0: sin cache)
+        """
+        self.coords = np.ascontiguousarray(coords, dtype=np.float64)
+        self.n = len(self.coords)
+        self.metric = metric
+        self.cache_rows = cache_rows
+        self._func = METRICS[metric]
+        self._item = _ITEM_METRICS.get(metric)
+        self._points = self.coords.tolist()
+        self._rows = OrderedDict()  # ciudad -> fila de distancias, de la mas vieja a la mas nueva
+
+    def item(self, u: int, v: int) -> int:
+        """Distancia entre las ciudades u y v como escalar de Python."""
+        if u == v:
+            return 0
+        if self.cache_rows:
+            return self.row(u).item(v)
+        if self._item is not None:
+            return self._item(self._points[u], self._points[v])
+        return self._func(self.coords[u], self.coords[v]).item()
+
+    def row(self, u: int) -> np.ndarray:
+        """Distancias desde la ciudad u a todas las demas (usando el cache LRU)."""
+        row = self._rows.get(u)
+        if row is not None:
+            self._rows.move_to_end(u)
+            return row
+        row = self._func(self.coords[u], self.coords)
+        row[u] = 0
+        if self.cache_rows:
+            self._rows[u] = row
+            if len(self._rows) > self.cache_rows:
+                self._rows.popitem(last=False)
+        return row
+
+    def pairs(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Distancias entre arreglos de ciudades (con broadcasting), en int64."""
+        d = self._func(self.coords[u], self.coords[v])
+        if self.metric == "GEO":  # la formula no da 0 entre una ciudad y si misma
+            d = np.where(np.asarray(u) == np.asarray(v), 0, d)
+        return d
+
+    @property
+    def dtype(self) -> type:
+        """Tipo de dato en el que se acumulan las distancias."""
+        return np.int64
+
+    def tour_length(self, tour: list[int]) -> int:
+        """Longitud de un tour cerrado [v_0,...,v_n] con v_n = v_0."""
+        t = np.asarray(tour)
+        return self.pairs(t[:-1], t[1:]).sum().item()
@@ -1,11 +1,38 @@
 """Este modulo se encarga de la lectura de archivos ".tsp".
 
+read_tsp() devuelve el grafo de networkx de la instancia, que tiene n^2
+aristas y es lento de construir para instancias grandes. read_instance()
+devuelve directamente la matriz de distancias y las coordenadas, y las
+guarda en un cache en disco (archivos ".npy" en el directorio CACHE_DIR,
+junto a la instancia) identificado por el hash del archivo. Las lecturas
+siguientes abren la matriz con np.load(mmap_mode='r'), sin volver a
+parsear el archivo ni calcular las distancias. Como la matriz queda en un
+archivo, los procesos que resuelven la misma instancia comparten una unica
+copia en memoria (ver DistanceMatrix.open()).
+
+read_coords() lee el encabezado y NODE_COORD_SECTION sin tsplib95 ni
+networkx. read_instance() lo usa para los tipos de distancia de
+distance.METRICS (EUC_2D, CEIL_2D, ATT y GEO) y calcula la matriz con
+numpy; el resto de los formatos (por ejemplo EXPLICIT) se leen con
+tsplib95.
+
 Requiere del paquete tsplib95.sd
 """
 
 from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import numpy as np
 from tsplib95 import load
 from networkx import Graph
+from distance import METRICS, DistanceMatrix
+
+# Directorio del cache, dentro del directorio de cada instancia
+CACHE_DIR = ".tspcache"
+
+# Version del formato del cache; cambiarla invalida los archivos anteriores
+CACHE_VERSION = 2
 
 
 def read_tsp(filename: str) -> tuple[Graph, dict[int, tuple[int, int]]]:
@@ -27,3 +54,150 @@ def read_tsp(filename: str) -> tuple[Graph, dict[int, tuple[int, int]]]:
     coords = problem.node_coords
     G = problem.get_graph()
     return G, coords
+
+
+def read_coords(filename: str) -> tuple[np.ndarray, str]:
+    """Lee las coordenadas y el tipo de distancia de un archivo ".tsp".
+
+    No construye el grafo: solo lee el encabezado y NODE_COORD_SECTION.
+
+    Argumentos:
+    ==========
+    filename: str
+        ruta de la instancia
+
+    Retorna:
+    =======
+    coords: np.ndarray
+        matriz (n, 2) con las coordenadas de cada ciudad (la fila v es la
+        ciudad v+1 del archivo)
+    metric: str
+        EDGE_WEIGHT_TYPE de la instancia; las distancias se calculan con
+        distance.METRICS[metric]
+
+    Lanza ValueError si la instancia no tiene NODE_COORD_SECTION o si su
+    tipo de distancia no esta en distance.METRICS.
+    """
+    header = {}
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("NODE_COORD_SECTION"):
+                break
+            key, sep, value = line.partition(":")
+            if sep:
+                header[key.strip()] = value.strip()
+        else:
+            raise ValueError(f"{filename}: falta NODE_COORD_SECTION")
+
+        metric = header.get("EDGE_WEIGHT_TYPE")
+        if metric not in METRICS:
+            raise ValueError(f"{filename}: tipo de distancia no soportado: {metric}")
+        n = int(header["DIMENSION"])
+        data = np.loadtxt(f, max_rows=n, usecols=(0, 1, 2), ndmin=2)
+
+    if len(data) != n:
+        raise ValueError(f"{filename}: se esperaban {n} ciudades y hay {len(data)}")
+    coords = np.empty((n, 2), dtype=np.float64)
+    coords[data[:, 0].astype(np.int64) - 1] = data[:, 1:]
+    return coords, metric
+
+
+def read_instance(filename: str, cache: bool = True) -> tuple[DistanceMatrix, np.ndarray | None]:
+    """Lee la matriz de distancias y las coordenadas de un archivo ".tsp".
+
+    Argumentos:
+    ==========
+    filename: str
+        ruta de la instancia
+    cache: bool
+        si es True se usa (y se completa) el cache en disco. Si no se puede
+        escribir en el directorio de la instancia se sigue sin cache.
+
+    Retorna:
+    =======
+    dist: DistanceMatrix
+        matriz de distancias, indexada desde 0. Si se usa el cache, es el
+        mmap de solo lectura del archivo del cache.
+    coords: np.ndarray | None
+        matriz (n, 2) con las coordenadas de cada ciudad, o None si la
+        instancia no las tiene
+    """
+    if not cache:
+        matrix, coords = _parse(filename)
+        return DistanceMatrix(matrix), coords
+
+    dist_file, coords_file = _cache_files(filename)
+    if os.path.exists(dist_file):
+        coords = np.load(coords_file) if os.path.exists(coords_file) else None
+        return DistanceMatrix.open(dist_file), coords
+
+    matrix, coords = _parse(filename)
+    try:
+        _clear_cache(filename)
+        # Las coordenadas se guardan antes que la matriz: si existe la
+        # matriz, el cache esta completo
+        if coords is not None:
+            _save(coords_file, coords)
+        _save(dist_file, matrix)
+    except OSError:
+        return DistanceMatrix(matrix), coords
+    return DistanceMatrix.open(dist_file), coords
+
+
+def _parse(filename: str) -> tuple[np.ndarray, np.ndarray | None]:
+    """Lee una instancia y calcula su matriz de distancias.
+
+    Usa read_coords() si el tipo de distancia lo permite y, si no, tsplib95.
+    """
+    try:
+        coords, metric = read_coords(filename)
+    except ValueError:
+        pass
+    else:
+        return DistanceMatrix.from_coords(coords, metric).matrix, coords
+
+    G, coords = read_tsp(filename)
+    matrix = DistanceMatrix.from_graph(G).matrix
+    if not coords:
+        return matrix, None
+    n = matrix.shape[0]
+    return matrix, np.array([coords[i] for i in range(1, n + 1)], dtype=np.float64)
+
+
+def _cache_files(filename: str) -> tuple[str, str]:
+    """Rutas de los archivos de cache (matriz y coordenadas) de una instancia."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    key = f"{os.path.basename(filename)}-v{CACHE_VERSION}-{digest.hexdigest()[:16]}"
+    folder = os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR)
+    return (os.path.join(folder, key + ".dist.npy"),
+            os.path.join(folder, key + ".coords.npy"))
+
+
+def _clear_cache(filename: str) -> None:
+    """Borra los archivos de cache de versiones anteriores de una instancia."""
+    folder = os.path.join(os.path.dirname(os.path.abspath(filename)), CACHE_DIR)
+    if not os.path.isdir(folder):
+        return
+    prefix = os.path.basename(filename) + "-"
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name.endswith(".npy"):
+            os.remove(os.path.join(folder, name))
+
+
+def _save(path: str, array: np.ndarray) -> None:
+    """Guarda un arreglo en un archivo ".npy" de forma atomica."""
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, array)
+        os.chmod(tmp, 0o644)  # mkstemp crea el archivo solo legible por el usuario
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
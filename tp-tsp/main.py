@@ -5,17 +5,134 @@ Fecha: 2023.
 Materia: Prog3 - TUIA
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from time import process_time, time
+import bounds
+import distance
 import parse
 import load
 import search
-import plot
 import problem
 
 # Algoritmos involucrados
 HILL_CLIMBING = "hill"
+HILL_CLIMBING_FIRST = "hill_first"
 HILL_CLIMBING_RANDOM_RESET = "hill_reset"
 TABU_SEARCH = "tabu"
-ALGO_NAMES = [HILL_CLIMBING, HILL_CLIMBING_RANDOM_RESET, TABU_SEARCH]
+VND = "vnd"
+LIN_KERNIGHAN = "lk"
+SIMULATED_ANNEALING = "sa"
+GENETIC_ALGORITHM = "ga"
+HELD_KARP = "held_karp"
+BRANCH_AND_BOUND = "bnb"
+ALGO_NAMES = [HILL_CLIMBING, HILL_CLIMBING_FIRST, HILL_CLIMBING_RANDOM_RESET,
+              TABU_SEARCH, VND, LIN_KERNIGHAN, SIMULATED_ANNEALING,
+              GENETIC_ALGORITHM, HELD_KARP, BRANCH_AND_BOUND]
+
+# Cantidad maxima de ciudades con la que se corre branch and bound sin
+# limite de tiempo; en instancias mas grandes solo se corre con time_limit
+BRANCH_AND_BOUND_UNTIMED_N = 30
+
+
+def make_algos(workers: int | None = 1, time_limit: float | None = None,
+               seed: int | None = None,
+               restart: str | None = None,
+               n: int | None = None) -> dict[str, search.LocalSearch]:
+    """Construye una instancia de cada algoritmo, indexadas por su nombre.
+
+    Argumentos:
+    ==========
+    workers: int | None
+        cantidad de procesos de hill_reset (None: uno por nucleo)
+    time_limit: float | None
+        tiempo maximo de cada algoritmo en segundos (None: sin limite)
+    seed: int | None
+        semilla de los algoritmos que usan numeros al azar
+    restart: str | None
+        generador de los reinicios de hill_reset (ver TSP.random_reset)
+    n: int | None
+        cantidad de ciudades de la instancia; los algoritmos exactos solo se
+        incluyen si n <= search.HeldKarp.MAX_N (held_karp) y si
+        n <= BRANCH_AND_BOUND_UNTIMED_N, o n <= search.BranchAndBound.MAX_N
+        con time_limit (bnb)
+
+    Retorno:
+    =======
+    algos: dict[str, search.LocalSearch]
+        un algoritmo por cada nombre de ALGO_NAMES (salvo los exactos si la
+        instancia es grande), en ese orden
+    """
+    algos = {HILL_CLIMBING: search.HillClimbing(max_time=time_limit),
+             HILL_CLIMBING_FIRST: search.HillClimbingFirst(max_time=time_limit),
+             HILL_CLIMBING_RANDOM_RESET: search.HillClimbingReset(
+                 workers=workers, seed=seed, max_time=time_limit, restart=restart),
+             TABU_SEARCH: search.Tabu(max_time=time_limit),
+             VND: search.VariableNeighbourhoodDescent(max_time=time_limit),
+             LIN_KERNIGHAN: search.LinKernighan(max_time=time_limit),
+             SIMULATED_ANNEALING: search.SimulatedAnnealing(max_time=time_limit, seed=seed),
+             GENETIC_ALGORITHM: search.GeneticAlgorithm(max_time=time_limit, seed=seed)}
+    if n is not None and n <= search.HeldKarp.MAX_N:
+        algos[HELD_KARP] = search.HeldKarp(max_time=time_limit)
+    if n is not None and (n <= BRANCH_AND_BOUND_UNTIMED_N
+                          or time_limit is not None and n <= search.BranchAndBound.MAX_N):
+        algos[BRANCH_AND_BOUND] = search.BranchAndBound(max_time=time_limit)
+    return algos
+
+
+def run(algo: search.LocalSearch, p: problem.TSP, stats: bool = False,
+        memory: bool = False) -> search.LocalSearch:
+    """Resuelve el TSP con un algoritmo y registra su tiempo de CPU.
+
+    Se usa tanto en secuencia como en un proceso aparte por algoritmo; en
+    ese caso retorna el algoritmo resuelto (con tour, value, time, niters,
+    cpu_time y, si stats o memory es True, las estadisticas de
+    algo.profile()) al proceso principal. Con memory tambien se mide el pico
+    de memoria.
+    """
+    start = process_time()
+    if stats or memory:
+        algo.profile(p, memory)
+    else:
+        algo.solve(p)
+    algo.cpu_time = process_time() - start
+    return algo
+
+
+def lower_bound(p: problem.TSP, algos: list[search.LocalSearch]) -> float | None:
+    """Mejor cota inferior conocida del largo del tour optimo.
+
+    Es la mayor entre bounds.lower_bound(), con el mejor tour de algos, y
+    las que dejan los algoritmos exactos: el largo de su tour si demostraron
+    que es optimo (optimal) o su lower_bound si se cortaron antes.
+
+    Argumentos:
+    ==========
+    p: problem.TSP
+        instancia resuelta
+    algos: list[search.LocalSearch]
+        algoritmos ya ejecutados sobre p
+
+    Retorno:
+    =======
+    bound: float | None
+        la cota, o None si la instancia es demasiado grande para calcularla
+    """
+    upper = min(-algo.value for algo in algos)
+    candidates = [bounds.lower_bound(p.dist, upper)]
+    for algo in algos:
+        if getattr(algo, "optimal", False):
+            candidates.append(-algo.value)
+        else:
+            candidates.append(getattr(algo, "lower_bound", None))
+    candidates = [c for c in candidates if c is not None]
+    return float(max(candidates)) if candidates else None
+
+
+def bound_gap(length: float, bound: float | None) -> float | None:
+    """Diferencia porcentual entre un largo y una cota inferior (None si no hay cota)."""
+    if bound is None or bound <= 0:
+        return None
+    return 100 * (length - bound) / bound
 
 
 def main() -> None:
@@ -23,32 +140,73 @@ def main() -> None:
     # Parsear los argumentos de la linea de comandos
     args = parse.parse()
 
-    # Leer la instancia
-    G, coords = load.read_tsp(args.filename)
+    # Leer la instancia (del cache en disco, si ya se leyo antes). Con
+    # --lazy no se arma la matriz: las distancias se calculan al consultarlas
+    if args.lazy:
+        coords, metric = load.read_coords(args.filename)
+        dist = distance.LazyDistance(coords, metric)
+    else:
+        dist, coords = load.read_instance(args.filename, cache=not args.no_cache)
+        # Sin cache, la matriz se pasa a un archivo temporal para que los
+        # procesos auxiliares la compartan en lugar de recibir una copia
+        if args.parallel or args.workers != 1:
+            dist = dist.share()
 
     # Construir la instancia de TSP
-    p = problem.TSP(G)
+    p = problem.TSP(dist, coords=coords, k=args.neighbours,
+                    neighbourhood=args.neighbourhood, init=args.init)
 
     # Construir las instancias de los algoritmos
-    algos = {HILL_CLIMBING: search.HillClimbing(),
-             HILL_CLIMBING_RANDOM_RESET: search.HillClimbingReset(),
-             TABU_SEARCH: search.Tabu()}
+    algos = make_algos(workers=args.workers or None, time_limit=args.time_limit,
+                       restart=args.restart, n=p.n)
 
-    # Resolver el TSP con cada algoritmo
-    for algo in algos.values():
-        algo.solve(p)
+    # Resolver el TSP con cada algoritmo, en secuencia o cada uno en su proceso
+    if args.parallel:
+        with ProcessPoolExecutor(max_workers=len(algos)) as pool:
+            futures = {name: pool.submit(run, algo, p, args.stats, args.memory)
+                       for name, algo in algos.items()}
+            algos = {name: future.result() for name, future in futures.items()}
+    else:
+        for algo in algos.values():
+            run(algo, p, args.stats, args.memory)
+
+    # Cota inferior del optimo, para acotar cuanto puede mejorar cada tour
+    start = time()
+    bound = lower_bound(p, list(algos.values()))
+    bound_time = time() - start
 
     # Mostrar resultados por linea de comandos
-    print("Valor:", "Tiempo:", "Iters:", "Algoritmo:", sep="\t\t")
+    print("Valor:", "Gap %:", "Tiempo:", "CPU:", "Iters:", "Algoritmo:", sep="\t\t")
     for name, algo in algos.items():
-        print(algo.value, "%.2f" % algo.time, algo.niters, name, sep="\t\t")
+        g = bound_gap(-algo.value, bound)
+        print(algo.value, "-" if g is None else "%.2f" % g, "%.2f" % algo.time,
+              "%.2f" % algo.cpu_time, algo.niters, name, sep="\t\t")
+    print()
+    print("Cota inferior:", "-" if bound is None else bound,
+          "(%.2f s)" % bound_time, sep="\t")
+    if BRANCH_AND_BOUND in algos:
+        bnb = algos[BRANCH_AND_BOUND]
+        print(BRANCH_AND_BOUND, "cota inferior:", bnb.lower_bound,
+              "gap: %.2f%%" % bnb.gap, "(optimo)" if bnb.optimal else "(sin terminar)",
+              sep="\t")
+    if args.stats or args.memory:
+        print()
+        for name, algo in algos.items():
+            print(name, algo.stats, sep="\t")
 
-    # Graficar los tours
+    # Graficar los tours (matplotlib solo se importa aca, asi benchmark.py
+    # puede usar este modulo sin el). Sin coordenadas (por ejemplo, con
+    # pesos EXPLICIT) no hay donde ubicar las ciudades
+    if coords is None:
+        print()
+        print("La instancia no tiene coordenadas: no se grafican los tours")
+        return
+    import plot
     tours = {}
     tours['init'] = (p.init, p.obj_val(p.init))  # estado inicial
     for name, algo in algos.items():
         tours[name] = (algo.tour, algo.value)
-    plot.show(G, coords, args.filename, tours)
+    plot.show(None, coords, args.filename, tours)
 
 
 if __name__ == "__main__":
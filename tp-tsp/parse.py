@@ -20,4 +20,142 @@ def parse() -> ArgumentParser:
                         metavar='filename.tsp',
                         help='path to input file')
 
+    # Agregamos los argumentos opcionales
+    parser.add_argument('-k', '--neighbours',
+                        type=int,
+                        default=None,
+                        metavar='K',
+                        help='restrict 2-opt moves to the K nearest \
+                              neighbours of each city (default: all moves)')
+    parser.add_argument('-n', '--neighbourhood',
+                        choices=['2opt', 'oropt', '3opt'],
+                        default='2opt',
+                        help='neighbourhood used by the local searches \
+                              (default: 2opt)')
+    parser.add_argument('-i', '--init',
+                        choices=['identity', 'nn', 'greedy', 'sfc', 'mst'],
+                        default='identity',
+                        help='initial tour: identity, nearest neighbour, \
+                              greedy edge, Hilbert curve or MST doubling \
+                              (default: identity)')
+    parser.add_argument('-r', '--restart',
+                        choices=['random', 'nn', 'greedy', 'sfc', 'mst'],
+                        default='random',
+                        help='tours used by the hill_reset restarts: random \
+                              or a randomized construction (default: random)')
+    parser.add_argument('-w', '--workers',
+                        type=int,
+                        default=1,
+                        help='processes used for the hill_reset restarts \
+                              (0: one per core, default: 1)')
+    parser.add_argument('-t', '--time-limit',
+                        type=float,
+                        default=None,
+                        metavar='SECONDS',
+                        help='stop each algorithm after SECONDS and report \
+                              its best tour so far (default: no limit)')
+    parser.add_argument('-p', '--parallel',
+                        action='store_true',
+                        help='run each algorithm in its own process')
+    parser.add_argument('-S', '--stats',
+                        action='store_true',
+                        help='count move evaluations and problem calls and \
+                              split evaluation time from the rest')
+    parser.add_argument('--memory',
+                        action='store_true',
+                        help='also measure the peak memory of each algorithm \
+                              (implies -S, slower)')
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='parse the instance again instead of using the \
+                              cached distance matrix')
+    parser.add_argument('-l', '--lazy',
+                        action='store_true',
+                        help='compute distances from the coordinates on \
+                              demand instead of storing the full matrix \
+                              (for large instances; use it with -k)')
+
+    return parser.parse_args()
+
+
+def parse_benchmark(algo_names: list[str]) -> ArgumentParser:
+    """Parsea la linea de comandos de benchmark.py.
+
+    Argumentos:
+    ==========
+    algo_names: list[str]
+        nombres de los algoritmos registrados
+    """
+    parser = ArgumentParser(
+        prog='python benchmark.py',
+        description='This program runs every algorithm on a set of TSP \
+                     instances with several seeds and stores the results.',
+    )
+
+    parser.add_argument('paths',
+                        nargs='*',
+                        metavar='path',
+                        help='.tsp files or directories with .tsp files \
+                              (default: the instances directory)')
+    parser.add_argument('-a', '--algorithms',
+                        nargs='+',
+                        choices=algo_names,
+                        default=algo_names,
+                        metavar='ALGO',
+                        help='algorithms to run (default: all of them)')
+    parser.add_argument('-s', '--seeds',
+                        nargs='+',
+                        type=int,
+                        default=[0, 1, 2],
+                        help='seeds of each run (default: 0 1 2)')
+    parser.add_argument('-t', '--time-limit',
+                        type=float,
+                        default=None,
+                        metavar='SECONDS',
+                        help='time limit of each run (default: no limit)')
+    parser.add_argument('-k', '--neighbours',
+                        type=int,
+                        default=None,
+                        metavar='K',
+                        help='candidate list size of the TSP (default: all moves)')
+    parser.add_argument('-i', '--init',
+                        choices=['identity', 'nn', 'greedy', 'sfc', 'mst'],
+                        default='identity',
+                        help='initial tour construction (default: identity)')
+    parser.add_argument('-r', '--restart',
+                        choices=['random', 'nn', 'greedy', 'sfc', 'mst'],
+                        default='random',
+                        help='hill_reset restart construction (default: random)')
+    parser.add_argument('-S', '--stats',
+                        action='store_true',
+                        help='record move evaluations, evaluations per second \
+                              and evaluation time (adds some overhead)')
+    parser.add_argument('--memory',
+                        action='store_true',
+                        help='also record the peak memory of each run \
+                              (implies --stats, slower)')
+    parser.add_argument('--optima',
+                        default=None,
+                        metavar='FILE',
+                        help='JSON file mapping instance names to optimal \
+                              lengths, added to the known ones')
+    parser.add_argument('-o', '--output',
+                        default=None,
+                        metavar='FILE',
+                        help='write the results as JSON to FILE')
+    parser.add_argument('--csv',
+                        default=None,
+                        metavar='FILE',
+                        help='write the results as CSV to FILE')
+    parser.add_argument('-b', '--baseline',
+                        default=None,
+                        metavar='FILE',
+                        help='JSON results of a previous version; runs that \
+                              got worse are reported as regressions')
+    parser.add_argument('--tolerance',
+                        type=float,
+                        default=0.2,
+                        help='relative slowdown allowed before reporting a \
+                              time regression (default: 0.2)')
+
     return parser.parse_args()
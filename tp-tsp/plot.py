@@ -6,25 +6,34 @@ Requiere del paquete matplotlib.
 from __future__ import annotations
 import matplotlib.pyplot as plt
 import networkx as nx
+import numpy as np
 
 
-def show(G: nx.Graph,
-         coords: dict[int, tuple[float, float]],
+def show(G: nx.Graph | None,
+         coords: dict[int, tuple[float, float]] | np.ndarray,
          name: str,
          sols: dict[str, tuple[list[int]], float]) -> None:
     """Grafica un conjunto de tours.
 
     Argumentos:
     ==========
-    G: nx.Graph
-        grafo que representa la instancia del TSP
-    coords: dict[int, tuple[float, float]]
-        diccionario con las coordenadas de cada ciudad
+    G: nx.Graph | None
+        grafo que representa la instancia del TSP. Si es None se construye
+        un grafo con las ciudades como nodos y sin aristas, que alcanza para
+        graficar.
+    coords: dict[int, tuple[float, float]] | np.ndarray
+        diccionario con las coordenadas de cada ciudad (del 1 al n), o
+        matriz (n, 2) como la devuelve load.read_instance
     name: str
         nombre de la instancia
     sols: dict[str, tuple[list[int]], float]
         diccionario con el tour y su costo para cada algoritmo de busqueda
     """
+    if isinstance(coords, np.ndarray):
+        coords = {v + 1: tuple(xy) for v, xy in enumerate(coords.tolist())}
+    if G is None:
+        G = nx.empty_graph(sorted(coords))
+
     # Crear los subplots
     fig, axs = plt.subplots(nrows=1, ncols=len(sols))
 
@@ -13,7 +13,9 @@ Formulacion de estado completo para el Problema del Viajante:
 
 * Estado inicial.
     Consideramos el estado inicial [0,1,2,...,n-1,0].
-    Pero cualquier estado puede ser inicial.
+    Pero cualquier estado puede ser inicial; tambien se puede construir
+    con una heuristica del modulo construct (vecino mas cercano, aristas
+    golosas, curva de Hilbert o arbol generador minimo).
 
 * Acciones.
     Consideramos como accion el intercambio de dos aristas del tour.
@@ -23,11 +25,25 @@ Formulacion de estado completo para el Problema del Viajante:
     (i,j): intercambiar la i-esima arista con la j-esima arista,
     con 0 <= i <= n-3, i+2 <= j <= n-1.
     Notar que las aristas elegidas no deben ser adyacentes.
+    Opcionalmente el vecindario se restringe con listas de candidatos:
+    solo se consideran las acciones en las que alguna de las aristas
+    nuevas une una ciudad con uno de sus k vecinos mas cercanos.
+
+    Ademas del vecindario 2-opt hay dos vecindarios de 3 aristas, cuyas
+    acciones son ternas (i,j,k) con 0 <= i < j < k <= n-1: se quitan las
+    aristas i, j y k y se intercambian los segmentos [v_i+1,...,v_j] y
+    [v_j+1,...,v_k], sin invertirlos (insercion de segmento, o 3-opt puro).
+    * "3opt": todas las ternas.
+    * "oropt": las ternas en las que alguno de los tres segmentos que
+      quedan (contando el que da la vuelta por v_0) tiene a lo sumo 3
+      ciudades, es decir, reubicar un segmento de 1 a 3 ciudades.
 
 * Resultado.
     resultado([v_0,...,v_n], (i,j)) =
         [v_0,...,v_i] ++ [v_j,...,v_i+1] ++ [v_j+1,...,v_n]
     Notar que [v_j,...,v_i+1] es el reverso de [v_i+1,...,v_j]
+    resultado([v_0,...,v_n], (i,j,k)) =
+        [v_0,...,v_i] ++ [v_j+1,...,v_k] ++ [v_i+1,...,v_j] ++ [v_k+1,...,v_n]
 
 * Funcion objetivo:
     obj_val([v_0,v_1,...,v_n-1,v_n]) =
@@ -38,8 +54,15 @@ Formulacion de estado completo para el Problema del Viajante:
 
 from __future__ import annotations
 from typing import TypeVar
+import random
 from random import shuffle
+import numpy as np
 from networkx import Graph
+import construct
+from spatial import GridIndex
+from distance import DistanceMatrix
+from tabu import TabuList
+from tour import Tour
 
 State = TypeVar('State')
 Action = TypeVar('Action')
@@ -51,6 +74,7 @@ class OptProblem:
     def __init__(self) -> None:
         """Construye una instancia de la clase."""
         self.init = None
+        self.evaluations = 0  # Sucesores evaluados por max_action y first_action
 
     def actions(self, state: State) -> list[Action]:
         """Determina la lista de acciones que se pueden aplicar a un estado."""
@@ -64,14 +88,58 @@ class OptProblem:
         """Determina el valor objetivo de un estado."""
         raise NotImplementedError
 
-    def max_action(self, state: State, tabu: list[State] = None) -> tuple[Action, float]:
+    def mutable(self, state: State, shortest: bool = False) -> State:
+        """Devuelve una copia mutable de un estado, sobre la que se puede usar apply().
+
+        Con shortest, apply() puede elegir otra forma de aplicar la accion
+        que lleva al mismo estado con menos trabajo (ver TSP.mutable()).
+        """
+        raise NotImplementedError
+
+    def apply(self, state: State, action: Action) -> None:
+        """Aplica una accion en el lugar a un estado devuelto por mutable()."""
+        raise NotImplementedError
+
+    def snapshot(self, state: State) -> State:
+        """Devuelve una copia (instantanea) de un estado devuelto por mutable()."""
+        raise NotImplementedError
+
+    def max_action(self, state: State, tabu: TabuList | None = None,
+                   value: float | None = None,
+                   neighbourhood: str | None = None) -> tuple[Action, float]:
         """Determina la accion que genera el sucesor con mayor valor objetivo para un estado dado.
 
         La idea es que este metodo este optimizado y sea mas eficiente que generar cada
         estado sucesor por separado y calcular su valor objetivo con self.obj_val().
+        Las acciones que pertenecen a tabu no se consideran. Si se conoce el valor
+        objetivo del estado se puede pasar en value para no recalcularlo. Si el
+        problema tiene varios vecindarios, neighbourhood elige cual usar.
+        """
+        raise NotImplementedError
+
+    def first_action(self, state: State, key, value: float | None = None,
+                     pos=None) -> tuple[Action, float]:
+        """Determina la primera accion asociada a key que mejora el valor objetivo.
+
+        Se usa en la busqueda con primera mejora: solo se exploran las acciones
+        "alrededor" de key (por ejemplo, de una ciudad del TSP). Retorna
+        (None, value) si ninguna de esas acciones mejora el estado.
         """
         raise NotImplementedError
 
+    def touched(self, state: State, action: Action) -> list:
+        """Determina las claves afectadas por una accion, para volver a explorarlas."""
+        raise NotImplementedError
+
+    def delta(self, state: State, action: Action) -> float:
+        """Determina la diferencia de valor objetivo que produce una accion."""
+        raise NotImplementedError
+
+    def random_action(self, state: State, neighbourhood: str | None = None,
+                      rng: random.Random = random) -> Action:
+        """Retorna una accion al azar del vecindario de un estado."""
+        raise NotImplementedError
+
     def random_reset(self) -> State:
         """Retorna un estado generado al azar. 
         
@@ -84,40 +152,258 @@ class TSP(OptProblem):
     """Subclase que representa al Problema del Viajante (TSP).
 
     Un estado es una lista de enteros: list[int].
-    Una accion es un par de enteros: tuple[int,int].
+    Una accion es un par de enteros: tuple[int,int] (2-opt) o una terna
+    de enteros: tuple[int,int,int] (Or-opt y 3-opt).
+    Los algoritmos que modifican el estado en el lugar usan un Tour
+    (ver self.mutable()), que admite las mismas consultas que una lista.
     """
 
-    def __init__(self, G: Graph) -> None:
+    # Backends disponibles para evaluar el vecindario en max_action
+    BACKENDS = ("numpy", "python")
+
+    # Vecindarios disponibles
+    NEIGHBOURHOODS = ("2opt", "oropt", "3opt")
+
+    # Largo maximo del segmento que se reubica en el vecindario Or-opt
+    OR_OPT_LENGTH = 3
+
+    def __init__(self, G: Graph | np.ndarray | DistanceMatrix, backend: str = "numpy",
+                 coords: dict[int, tuple[float, float]] | np.ndarray | None = None,
+                 k: int | None = None, neighbourhood: str = "2opt",
+                 init: str = "identity") -> None:
         """Construye una instancia de TSP.
 
         Argumentos:
         ==========
-        G: Graph
+        G: Graph | np.ndarray | DistanceMatrix
             grafo con los datos del problema
             los nodos del grafo se enumeran de 1 a n, ¡cuidado!
+            Tambien se puede pasar directamente la matriz de distancias
+            indexada desde 0 o un backend de distancias ya construido
+            (DistanceMatrix, por ejemplo el de load.read_instance, o
+            LazyDistance, ver el modulo distance).
+        backend: str
+            "numpy" evalua todo el vecindario 2-opt de forma vectorizada,
+            "python" usa el ciclo de referencia. Ambos devuelven la misma
+            accion, incluso ante empates.
+        coords: dict[int, tuple[float, float]] | np.ndarray | None
+            coordenadas de cada ciudad, tal como las devuelve load.read_tsp
+            (ciudades del 1 al n) o load.read_instance (matriz (n, 2)).
+            Se usan para las listas de candidatos. Si es None y el backend
+            de distancias tiene coordenadas (LazyDistance), se usan esas.
+        k: int | None
+            cantidad de vecinos mas cercanos de cada ciudad. Si es None se
+            usa el vecindario 2-opt completo; si no, el restringido a las
+            listas de candidatos. Los vecinos se calculan con las coordenadas
+            o, si no se pasan, con la matriz de distancias.
+        neighbourhood: str
+            vecindario por defecto ("2opt", "oropt" o "3opt"). El vecindario
+            "3opt" completo tiene O(n^3) acciones; conviene usarlo con k.
+        init: str
+            estado inicial: "identity" para [0,1,...,n-1,0] o el nombre de
+            una heuristica de construct.CONSTRUCTIONS ("nn", "greedy",
+            "sfc" o "mst")
+
+        El grafo solo se usa para construir la matriz de distancias
+        (self.dist), indexada desde 0. Todas las consultas de costo
+        pasan por self.dist y no se guarda una referencia al grafo.
         """
         super().__init__()
-        self.G = G
-        self.init = list(range(0, G.number_of_nodes()))
-        self.init.append(0)
+        if backend not in self.BACKENDS:
+            raise ValueError(f"backend desconocido: {backend!r}")
+        self.backend = backend
+        if neighbourhood not in self.NEIGHBOURHOODS:
+            raise ValueError(f"vecindario desconocido: {neighbourhood!r}")
+        self.neighbourhood = neighbourhood
+        if isinstance(G, Graph):
+            self.dist = DistanceMatrix.from_graph(G)
+        elif isinstance(G, np.ndarray):
+            self.dist = DistanceMatrix(G)
+        else:
+            self.dist = G
+        self.n = self.dist.n
+        self.coords = None
+        if coords is None:
+            coords = getattr(self.dist, "coords", None)
+        if isinstance(coords, np.ndarray):
+            self.coords = coords.astype(np.float64, copy=False)
+        elif coords:
+            self.coords = np.array([coords[i] for i in range(1, self.n + 1)],
+                                   dtype=np.float64)
+        # Indice espacial de las coordenadas, para las consultas de cercania
+        self.index = GridIndex(self.coords) if self.coords is not None else None
+        self.k = k
+        self.neighbours = None  # self.neighbours[v] = k ciudades mas cercanas a v
+        if k is not None:
+            self.neighbours = self.nearest_neighbours(min(k, self.n - 1))
+        # Sin listas de candidatos, todas las ciudades ordenadas por distancia
+        # a cada ciudad (se calculan a medida que first_action las necesita)
+        self._by_distance = {}
+        if init == "identity":
+            self.init = list(range(0, self.n))
+            self.init.append(0)
+        else:
+            self.init = construct.construct(self, init)
+
+    def nearest_neighbours(self, k: int) -> np.ndarray:
+        """Calcula las listas de candidatos de cada ciudad.
+
+        Retorno:
+        =======
+        neighbours: np.ndarray
+            matriz (n, k) donde la fila v tiene las k ciudades mas cercanas
+            a v, ordenadas de la mas cercana a la mas lejana
+
+        Con coordenadas se usa el indice espacial self.index (O(n log n));
+        si no, se recorre la matriz de distancias por bloques (O(n^2)).
+        """
+        n = self.n
+        cities = np.arange(n)
+        if self.index is not None:
+            return self.index.knn(self.coords, k, skip=cities).astype(np.int32)
+        neighbours = np.empty((n, k), dtype=np.int32)
+        rows = max(1, (1 << 20) // n)  # filas por bloque
+        for start in range(0, n, rows):
+            u = cities[start:start + rows]
+            d = self.dist.pairs(u[:, None], cities[None, :]).astype(np.float64)
+            d[np.arange(len(u)), u] = np.inf  # una ciudad no es vecina de si misma
+            near = np.argpartition(d, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(d, near, axis=1), axis=1, kind='stable')
+            neighbours[u] = np.take_along_axis(near, order, axis=1)
+        return neighbours
+
+    def _candidate_actions(self, state: list[int]) -> tuple[np.ndarray, np.ndarray]:
+        """Determina las acciones 2-opt restringidas a las listas de candidatos.
+
+        Para cada ciudad a en la posicion p y cada candidato c en la posicion q
+        se consideran las dos acciones que agregan la arista (a, c):
+        la que la agrega como (state[i], state[j]) y la que la agrega como
+        (state[i+1], state[j+1]).
 
-    def actions(self, state: list[int]) -> list[tuple[int, int]]:
+        Retorno:
+        =======
+        i, j: np.ndarray
+            acciones (i[m], j[m]) validas, sin repetir y en orden lexicografico
+        """
+        n = self.n
+        t = np.asarray(state)
+        pos = np.empty(n, dtype=np.int64)
+        pos[t[:-1]] = np.arange(n)
+        p = np.broadcast_to(pos[:, None], self.neighbours.shape).ravel()
+        q = pos[self.neighbours].ravel()
+        pp = (p - 1) % n
+        qq = (q - 1) % n
+        i = np.concatenate((np.minimum(p, q), np.minimum(pp, qq)))
+        j = np.concatenate((np.maximum(p, q), np.maximum(pp, qq)))
+        valid = (j >= i + 2) & ~((i == 0) & (j == n - 1))
+        keys = np.unique(i[valid] * n + j[valid])
+        return keys // n, keys % n
+
+    def _canonical_triples(self, e1: np.ndarray, e2: np.ndarray,
+                           e3: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Lleva ternas de aristas a la forma de accion (i,j,k) con i < j < k.
+
+        Las ternas (e1,e2,e3) deben estar en orden ciclico (modulo n): las que
+        no lo estan, o repiten aristas, se descartan. Rotar una terna no cambia
+        el movimiento, por lo que se rota para que empiece por la menor.
+
+        Retorno:
+        =======
+        i, j, k: np.ndarray
+            acciones validas, sin repetir y en orden lexicografico
+        """
+        n = self.n
+        e1, e2, e3 = e1.ravel() % n, e2.ravel() % n, e3.ravel() % n
+        b = (e2 - e1) % n
+        c = (e3 - e1) % n
+        ok = (b > 0) & (c > b)
+        e1, e2, e3 = e1[ok], e2[ok], e3[ok]
+        first = np.argmin(np.stack((e1, e2, e3)), axis=0)
+        i = np.choose(first, (e1, e2, e3))
+        j = np.choose(first, (e2, e3, e1))
+        k = np.choose(first, (e3, e1, e2))
+        keys = np.unique((i * n + j) * n + k)
+        return keys // (n * n), keys // n % n, keys % n
+
+    def _segment_blocks(self, state: list[int], neighbourhood: str):
+        """Genera las acciones de los vecindarios "oropt" y "3opt" por bloques.
+
+        Cada bloque es una terna de arreglos (i, j, k). Las acciones de cada
+        bloque estan en orden lexicografico y los bloques tambien, de modo que
+        recorrerlos da self.actions(state, neighbourhood) en orden.
+        """
+        n = self.n
+        if n < 4:
+            return
+        t = np.asarray(state)
+        pos = np.asarray(self.positions(state))
+        cities = np.arange(n)
+
+        if neighbourhood == "oropt":
+            # Se reubica el segmento [v_s,...,v_s+L-1] entre v_g y v_g+1:
+            # se quitan las aristas s-1, s+L-1 y g.
+            e1, e2, e3 = [], [], []
+            for length in range(1, min(self.OR_OPT_LENGTH, n - 3) + 1):
+                s = cities
+                last = t[(s + length - 1) % n]
+                if self.neighbours is not None:
+                    # v_g candidato del primero, o v_g+1 candidato del ultimo
+                    g = np.concatenate((pos[self.neighbours[t[s]]],
+                                        pos[self.neighbours[last]] - 1), axis=1)
+                else:
+                    g = np.broadcast_to(cities, (n, n))
+                e1.append(np.broadcast_to((s - 1)[:, None], g.shape).ravel())
+                e2.append(np.broadcast_to((s + length - 1)[:, None], g.shape).ravel())
+                e3.append(g.ravel())
+            yield self._canonical_triples(np.concatenate(e1), np.concatenate(e2),
+                                          np.concatenate(e3))
+
+        elif self.neighbours is not None:
+            # 3-opt restringido: v_j+1 candidato de v_i y v_k candidato de v_i+1
+            i = cities[:, None, None]
+            j = pos[self.neighbours[t[cities]]][:, :, None] - 1
+            k = pos[self.neighbours[t[cities + 1]]][:, None, :]
+            i, j, k = np.broadcast_arrays(i, j, k)
+            yield self._canonical_triples(i, j, k)
+
+        else:
+            # 3-opt completo, por bloques de i
+            rows = max(1, (1 << 20) // (n * n))
+            for start in range(0, n - 2, rows):
+                i, j, k = np.meshgrid(np.arange(start, min(start + rows, n - 2)),
+                                      cities, cities, indexing='ij')
+                valid = (i < j) & (j < k)
+                yield i[valid], j[valid], k[valid]
+
+    def actions(self, state: list[int],
+                neighbourhood: str | None = None) -> list[tuple[int, ...]]:
         """Determina la lista de acciones que se pueden aplicar a un estado.
 
         Argumentos:
         ==========
         state: list[int]
             un estado
+        neighbourhood: str | None
+            vecindario a usar (por defecto, self.neighbourhood)
 
         Retorno:
         =======
-        act: list[tuple[int, int]]
+        act: list[tuple[int, ...]]
             lista de acciones
         """
+        neighbourhood = neighbourhood or self.neighbourhood
+        if neighbourhood != "2opt":
+            act = []
+            for i, j, k in self._segment_blocks(state, neighbourhood):
+                act.extend(zip(i.tolist(), j.tolist(), k.tolist()))
+            return act
+        if self.neighbours is not None:
+            i, j = self._candidate_actions(state)
+            return list(zip(i.tolist(), j.tolist()))
         act = []
-        for i in range(0, self.G.number_of_nodes() - 2):
-            for j in range(i + 2, self.G.number_of_nodes()):
-                if (j + 1) % self.G.number_of_nodes() != i:
+        for i in range(0, self.n - 2):
+            for j in range(i + 2, self.n):
+                if (j + 1) % self.n != i:
                     act.append((i, j))
         return act
 
@@ -136,11 +422,44 @@ class TSP(OptProblem):
         succ: list[int]
             estado sucesor
         """
+        if len(action) == 3:
+            i, j, k = action
+            succ = list(state[:i + 1]) + list(state[j + 1:k + 1]) \
+                + list(state[i + 1:j + 1]) + list(state[k + 1:])
+            return succ
         succ = list(state)  # copy of the current state
         i, j = action
         succ[i + 1: j+1] = state[i + 1: j+1][::-1]  # reverse
         return succ
 
+    def mutable(self, state: list[int], shortest: bool = False) -> Tour:
+        """Devuelve una copia de un estado como Tour, que se modifica en el lugar.
+
+        Por defecto apply() mueve las ciudades igual que result(), y las
+        demas conservan su posicion. Con shortest invierte o desplaza los
+        segmentos mas cortos que dan el mismo tour ciclico (ver Tour), lo que
+        es mas rapido pero cambia las posiciones: solo conviene en algoritmos
+        que no eligen ni recuerdan las acciones por posicion.
+        """
+        return Tour(state, shortest)
+
+    def apply(self, state: Tour, action: tuple[int, ...]) -> None:
+        """Aplica una accion en el lugar a un Tour.
+
+        Si el Tour se creo con shortest, puede mover otros segmentos que los
+        de self.result(state, action) (por ejemplo, invertir el complemento de
+        [v_i+1,...,v_j]), por lo que las posiciones de las ciudades cambian,
+        pero el tour ciclico resultante es el mismo.
+        """
+        if len(action) == 3:
+            state.exchange(*action)
+        else:
+            state.reverse(*action)
+
+    def snapshot(self, state: Tour) -> list[int]:
+        """Devuelve el estado representado por un Tour como lista (empezando en 0)."""
+        return state.tolist()
+
     def obj_val(self, state: list[int]) -> float:
         """Determina el valor objetivo de un estado.
 
@@ -154,64 +473,430 @@ class TSP(OptProblem):
         value: float
             valor objetivo
         """
-        value = 0
-        for i in range(0, self.G.number_of_nodes()):
-            u = state[i]+1  # origen
-            v = state[i+1]+1  # destino
-            value -= self.G.get_edge_data(u, v)['weight']
-        return value
+        return -self.dist.tour_length(state)
 
-    def max_action(self, state: list[int], tabu: list[tuple[int,int]] = None) -> tuple[tuple[int, int], float]:
+    def batch_obj_val(self, tours: np.ndarray) -> np.ndarray:
+        """Determina el valor objetivo de varios tours a la vez.
+
+        Argumentos:
+        ==========
+        tours: np.ndarray
+            matriz (m, n) con un tour por fila, sin repetir la primera ciudad
+            al final (cada fila es una permutacion de las n ciudades)
+
+        Retorno:
+        =======
+        values: np.ndarray
+            valores objetivo de los m tours
+        """
+        return -self.dist.pairs(tours, np.roll(tours, -1, axis=1)).sum(axis=1)
+
+    def max_action(self, state: list[int], tabu: TabuList | None = None,
+                   value: float | None = None,
+                   neighbourhood: str | None = None) -> tuple[tuple[int, ...], float]:
         """Determina la accion que genera el sucesor con mayor valor objetivo para un estado dado.
         
         Se encuentra optimizada y por razones de eficiencia no se generan los sucesores y 
-        tampoco se llama a self.obj_val().
+        tampoco se llama a self.obj_val() por cada sucesor.
+
+        Ante empates se elige la primera accion en el orden de
+        self.actions(state, neighbourhood).
 
         Argumentos:
         ==========
         state: list[int]
             un estado
+        tabu: TabuList | None
+            acciones que no se pueden elegir
+        value: float | None
+            valor objetivo de state, si ya se conoce (evita llamar a self.obj_val)
+        neighbourhood: str | None
+            vecindario a usar (por defecto, self.neighbourhood)
 
         Retorno:
         =======
-        max_act: tuple[int, int]
+        max_act: tuple[int, ...]
             accion que genera el sucesor con mayor valor objetivo
         max_val: float
             valor objetivo del sucesor que resulta de aplicar min_act
         """
-        value = self.obj_val(state)
+        if value is None:
+            value = self.obj_val(state)
+        neighbourhood = neighbourhood or self.neighbourhood
+        if self.backend == "python":
+            return self._max_action_python(state, tabu, value, neighbourhood)
+        if neighbourhood != "2opt":
+            return self._max_action_segments(state, tabu, value, neighbourhood)
+        if self.neighbours is not None:
+            return self._max_action_candidates(state, tabu, value)
+        return self._max_action_numpy(state, tabu, value)
+
+    def _max_action_python(self, state: list[int], tabu: TabuList | None,
+                           value: float, neighbourhood: str) -> tuple[tuple[int, ...], float]:
+        """Version de referencia de max_action: recorre las acciones una por una."""
+        dist = self.dist.item
         max_act = None
         max_val = float("-inf")
-        for a in self.actions(state):
+        evaluated = 0
+        for a in self.actions(state, neighbourhood):
             if tabu is not None and a in tabu: 
                 continue
+            evaluated += 1
+            if len(a) == 3:
+                i, j, k = a
+                v1, v2 = state[i], state[i+1]
+                v3, v4 = state[j], state[j+1]
+                v5, v6 = state[k], state[k+1]
+                succ_value = value + dist(v1, v2) + dist(v3, v4) + dist(v5, v6) \
+                    - dist(v1, v4) - dist(v5, v2) - dist(v3, v6)
+                if succ_value > max_val:
+                    max_act = a
+                    max_val = succ_value
+                continue
             i, j = a
-            v1 = state[i]+1  
-            v2 = state[i+1]+1 
-            v3 = state[j]+1
-            v4 = state[j+1]+1
-            distl1l2 = self.G.get_edge_data(v1, v2)['weight']
-            distl3l4 = self.G.get_edge_data(v3, v4)['weight']
-            distl1l3 = self.G.get_edge_data(v1, v3)['weight']
-            distl2l4 = self.G.get_edge_data(v2, v4)['weight']
+            v1 = state[i]
+            v2 = state[i+1]
+            v3 = state[j]
+            v4 = state[j+1]
+            distl1l2 = dist(v1, v2)
+            distl3l4 = dist(v3, v4)
+            distl1l3 = dist(v1, v3)
+            distl2l4 = dist(v2, v4)
             succ_value =  value + distl1l2 + distl3l4 - distl1l3 - distl2l4
             if succ_value > max_val:
                 max_act = a
                 max_val = succ_value
+        self.evaluations += evaluated
+        return max_act, max_val
+
+    def _max_action_numpy(self, state: list[int], tabu: TabuList | None,
+                          value: float) -> tuple[tuple[int, int], float]:
+        """Version vectorizada de max_action.
+
+        Calcula la matriz de valores de los sucesores
+            value + d[a,b] + d[c,e] - d[a,c] - d[b,e]
+        con a = state[i], b = state[i+1], c = state[j], e = state[j+1],
+        por bloques de filas para acotar la memoria. Las sumas se hacen en
+        el mismo orden que en la version de referencia, asi que los valores
+        (y los empates) coinciden exactamente.
+        """
+        n = self.n
+        t = np.asarray(state)
+        a = t[:-1]  # a[k] = state[k], origen de la k-esima arista
+        b = t[1:]  # b[k] = state[k+1], destino de la k-esima arista
+        removed = self.dist.pairs(a, b)
+        cols = np.arange(n)
+        if removed.dtype.kind == 'i':
+            lowest = np.iinfo(removed.dtype).min
+        else:
+            lowest = -np.inf
+        tabu_i, tabu_j = _tabu_arrays(tabu, 2)
+
+        max_act = None
+        max_val = float("-inf")
+        rows = max(1, (1 << 20) // n)  # filas por bloque
+        for start in range(0, n - 2, rows):
+            i = np.arange(start, min(start + rows, n - 2))
+            succ = value + removed[i, None]
+            succ = succ + removed[None, :]
+            succ = succ - self.dist.pairs(a[i, None], a[None, :])
+            succ = succ - self.dist.pairs(b[i, None], b[None, :])
+
+            # Solo son validas las aristas no adyacentes (i+2 <= j y (i,j) != (0,n-1))
+            valid = cols[None, :] >= i[:, None] + 2
+            if start == 0:
+                valid[0, n - 1] = False
+            in_block = (tabu_i >= start) & (tabu_i < start + len(i))
+            valid[tabu_i[in_block] - start, tabu_j[in_block]] = False
+
+            succ = np.where(valid, succ, lowest)
+            self.evaluations += int(np.count_nonzero(valid))
+            k = int(np.argmax(succ))
+            if valid.flat[k] and succ.flat[k] > max_val:
+                max_act = (start + k // n, k % n)
+                max_val = succ.flat[k].item()
+        return max_act, max_val
+
+    def _max_action_candidates(self, state: list[int], tabu: TabuList | None,
+                               value: float) -> tuple[tuple[int, int], float]:
+        """Version vectorizada de max_action sobre las listas de candidatos.
+
+        Evalua solo las O(n*k) acciones de self._candidate_actions(state).
+        """
+        n = self.n
+        i, j = self._candidate_actions(state)
+        if len(i) == 0:
+            return None, float("-inf")
+        t = np.asarray(state)
+        a, b, c, e = t[i], t[i + 1], t[j], t[j + 1]
+        succ = value + self.dist.pairs(a, b)
+        succ = succ + self.dist.pairs(c, e)
+        succ = succ - self.dist.pairs(a, c)
+        succ = succ - self.dist.pairs(b, e)
+        tabu_i, tabu_j = _tabu_arrays(tabu, 2)
+        if len(tabu_i):
+            allowed = ~np.isin(i * n + j, tabu_i * n + tabu_j)
+            if not allowed.any():
+                return None, float("-inf")
+            i, j, succ = i[allowed], j[allowed], succ[allowed]
+        self.evaluations += len(i)
+        k = int(np.argmax(succ))
+        return (int(i[k]), int(j[k])), succ[k].item()
+
+    def _max_action_segments(self, state: list[int], tabu: TabuList | None,
+                             value: float, neighbourhood: str) -> tuple[tuple[int, int, int], float]:
+        """Version vectorizada de max_action para los vecindarios "oropt" y "3opt"."""
+        n = self.n
+        t = np.asarray(state)
+        tabu_i, tabu_j, tabu_k = _tabu_arrays(tabu, 3)
+        tabu_keys = (tabu_i * n + tabu_j) * n + tabu_k
+        max_act = None
+        max_val = float("-inf")
+        for i, j, k in self._segment_blocks(state, neighbourhood):
+            if len(tabu_keys):
+                allowed = ~np.isin((i * n + j) * n + k, tabu_keys)
+                i, j, k = i[allowed], j[allowed], k[allowed]
+            if len(i) == 0:
+                continue
+            self.evaluations += len(i)
+            succ = self._segment_values(t, i, j, k, value)
+            m = int(np.argmax(succ))
+            if succ[m] > max_val:
+                max_act = (int(i[m]), int(j[m]), int(k[m]))
+                max_val = succ[m].item()
         return max_act, max_val
-    
 
+    def _segment_values(self, t: np.ndarray, i: np.ndarray, j: np.ndarray,
+                        k: np.ndarray, value: float) -> np.ndarray:
+        """Valores objetivo de los sucesores de las acciones (i[m], j[m], k[m]).
+
+        Se suman en el mismo orden que en self._max_action_python(), para que
+        ambas versiones den exactamente los mismos valores.
+        """
+        pairs = self.dist.pairs
+        succ = value + pairs(t[i], t[i + 1])
+        succ = succ + pairs(t[j], t[j + 1])
+        succ = succ + pairs(t[k], t[k + 1])
+        succ = succ - pairs(t[i], t[j + 1])
+        succ = succ - pairs(t[k], t[i + 1])
+        succ = succ - pairs(t[j], t[k + 1])
+        return succ
+
+    def delta(self, state: list[int], action: tuple[int, ...]) -> float:
+        """Determina en O(1) la diferencia de valor objetivo que produce una accion.
+
+        Es decir, self.obj_val(self.result(state, action)) - self.obj_val(state).
+        """
+        dist = self.dist.item
+        if len(action) == 3:
+            i, j, k = action
+            a, b = state[i], state[i + 1]
+            c, d = state[j], state[j + 1]
+            e, f = state[k], state[k + 1]
+            return dist(a, b) + dist(c, d) + dist(e, f) \
+                - dist(a, d) - dist(e, b) - dist(c, f)
+        i, j = action
+        a, b = state[i], state[i + 1]
+        c, e = state[j], state[j + 1]
+        return dist(a, b) + dist(c, e) - dist(a, c) - dist(b, e)
+
+    def random_action(self, state: list[int], neighbourhood: str | None = None,
+                      rng: random.Random = random) -> tuple[int, ...]:
+        """Retorna una accion al azar del vecindario de un estado, en O(1).
+
+        En los vecindarios 2-opt y Or-opt, si hay listas de candidatos, la
+        accion agrega una arista entre una ciudad al azar y uno de sus
+        candidatos; si no, se elige entre todas las acciones del vecindario.
+        Con un Tour el costo es O(1); con una lista hay que calcular antes
+        las posiciones, en O(n).
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        neighbourhood: str | None
+            vecindario a usar (por defecto, self.neighbourhood)
+        rng: random.Random
+            generador de numeros al azar
+
+        Retorno:
+        =======
+        act: tuple[int, ...] | None
+            una accion, o None si el vecindario es vacio
+        """
+        n = self.n
+        neighbourhood = neighbourhood or self.neighbourhood
+        if n < 5:
+            return None
+        pos = self.positions(state)
+        neighbours = self.neighbours
+        while True:
+            if neighbourhood == "2opt":
+                if neighbours is not None:
+                    a = rng.randrange(n)
+                    p, q = int(pos[a]), int(pos[neighbours.item(a, rng.randrange(neighbours.shape[1]))])
+                    if rng.random() < 0.5:
+                        p, q = (p - 1) % n, (q - 1) % n
+                else:
+                    p, q = rng.randrange(n), rng.randrange(n)
+                i, j = min(p, q), max(p, q)
+                if j >= i + 2 and not (i == 0 and j == n - 1):
+                    return i, j
+                continue
+
+            if neighbourhood == "oropt":
+                # Reubicar el segmento [v_s,...,v_s+L-1] entre v_g y v_g+1
+                length = rng.randint(1, self.OR_OPT_LENGTH)
+                s = rng.randrange(n)
+                if neighbours is not None:
+                    k = rng.randrange(neighbours.shape[1])
+                    if rng.random() < 0.5:
+                        g = int(pos[neighbours.item(state[s], k)])
+                    else:
+                        g = int(pos[neighbours.item(state[(s + length - 1) % n], k)]) - 1
+                else:
+                    g = rng.randrange(n)
+                edges = (s - 1, s + length - 1, g)
+            else:
+                edges = (rng.randrange(n), rng.randrange(n), rng.randrange(n))
+            act = _canonical_triple(n, *edges)
+            if act is not None:
+                return act
+
+    def positions(self, state: list[int]) -> list[int]:
+        """Determina la posicion de cada ciudad en el tour.
+
+        Retorno:
+        =======
+        pos: list[int]
+            pos[v] es la posicion de la ciudad v en state (entre 0 y n-1)
+        """
+        if isinstance(state, Tour):
+            return state.pos  # se mantiene actualizado en el lugar
+        pos = np.empty(self.n, dtype=np.int64)
+        pos[np.asarray(state[:-1])] = np.arange(self.n)
+        return pos.tolist()
+
+    def first_action(self, state: list[int], city: int, value: float | None = None,
+                     pos: list[int] | None = None) -> tuple[tuple[int, int], float]:
+        """Determina la primera accion 2-opt que mejora el tour alrededor de una ciudad.
+
+        Se consideran las acciones que quitan una de las dos aristas de city
+        y agregan una arista (city, c), con c en la lista de candidatos de city
+        (o cualquier ciudad si no hay listas de candidatos), del candidato mas
+        cercano al mas lejano.
 
-    def random_reset(self) -> list[int]:
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado
+        city: int
+            ciudad alrededor de la cual se buscan las acciones
+        value: float | None
+            valor objetivo de state, si ya se conoce
+        pos: list[int] | None
+            posiciones de las ciudades, como las devuelve self.positions(state)
+
+        Retorno:
+        =======
+        act: tuple[int, int] | None
+            primera accion que mejora el valor objetivo, o None si no hay
+        succ_val: float
+            valor objetivo del sucesor (o value si act es None)
+        """
+        if value is None:
+            value = self.obj_val(state)
+        if pos is None:
+            pos = self.positions(state)
+        n = self.n
+        dist = self.dist.item
+        if self.neighbours is not None:
+            candidates = self.neighbours[city].tolist()
+        else:
+            candidates = self._by_distance.get(city)
+            if candidates is None:
+                d = self.dist.pairs(city, np.arange(n))
+                order = np.argsort(d, kind='stable')
+                candidates = order[order != city].tolist()
+                self._by_distance[city] = candidates
+
+        a = city
+        p = int(pos[a])
+        evaluated = 0
+        # Sentido 1: se quita (a, b) con b sucesor de a, y (c, e) con e sucesor de c
+        # Sentido 2: se quita (b, a) con b predecesor de a, y (e, c) con e predecesor de c
+        # En ambos casos se agregan (a, c) y (b, e).
+        for step in (1, -1):
+            b = state[(p + step) % n]
+            d_ab = dist(a, b)
+            for c in candidates:
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    continue
+                q = int(pos[c])
+                e = state[(q + step) % n]
+                if step == 1:
+                    i, j = sorted((p, q))
+                else:
+                    i, j = sorted(((p - 1) % n, (q - 1) % n))
+                if j < i + 2 or (i == 0 and j == n - 1):
+                    continue
+                succ_value = value + d_ab + dist(c, e) - d_ac - dist(b, e)
+                evaluated += 1
+                if succ_value > value:
+                    self.evaluations += evaluated
+                    return (i, j), succ_value
+        self.evaluations += evaluated
+        return None, value
+
+    def touched(self, state: list[int], action: tuple[int, ...]) -> list[int]:
+        """Determina las ciudades extremo de las aristas que cambia una accion."""
+        touched = []
+        for i in action:
+            touched.extend((state[i], state[i + 1]))
+        return touched
+
+    def random_reset(self, method: str = "random") -> list[int]:
         """Devuelve un estado del TSP con un tour aleatorio.
+
+        Argumentos:
+        ==========
+        method: str
+            "random" para una permutacion al azar, o el nombre de una
+            heuristica de construct.CONSTRUCTIONS, que se aleatoriza con
+            el generador del modulo random
         
         Retorno:
         =======
         state: list[int]
             un estado
         """
-        state = [i for i in range(1, self.G.number_of_nodes())]
+        if method != "random":
+            return construct.construct(self, method, random)
+        state = [i for i in range(1, self.n)]
         shuffle(state)  # mezclar la lista
         state.append(0)  # agregar a 0 como inicio del tour
         state.insert(0, 0)  # agregar a 0 como fin del tour
         return state
+
+
+def _tabu_arrays(tabu: TabuList | None, size: int) -> tuple[np.ndarray, ...]:
+    """Separa las acciones tabu de un tamaño dado en un arreglo por componente."""
+    acts = [a for a in tabu if len(a) == size] if tabu else []
+    if not acts:
+        return tuple(np.empty(0, dtype=np.int64) for _ in range(size))
+    return tuple(np.array(acts, dtype=np.int64).T)
+
+
+def _canonical_triple(n: int, e1: int, e2: int, e3: int) -> tuple[int, int, int] | None:
+    """Version escalar de TSP._canonical_triples para una terna de aristas."""
+    e1, e2, e3 = e1 % n, e2 % n, e3 % n
+    b = (e2 - e1) % n
+    c = (e3 - e1) % n
+    if not 0 < b < c:
+        return None
+    if e1 < e2 and e1 < e3:
+        return e1, e2, e3
+    if e2 < e3:
+        return e2, e3, e1
+    return e3, e1, e2
@@ -7,40 +7,218 @@ Las subclases que se encuentran en este modulo son:
 * HillClimbing: algoritmo de ascension de colinas. Se mueve al sucesor con
 mejor valor objetivo. Ya viene implementado.
 
+* HillClimbingFirst: algoritmo de ascension de colinas con primera mejora y
+"don't-look bits": solo explora los movimientos alrededor de las ciudades
+activas y toma el primero que mejora.
+
 * HillClimbingReset: algoritmo de ascension de colinas de reinicio aleatorio.
 No viene implementado, se debe completar.
 
 * Tabu: algoritmo de busqueda tabu.
 No viene implementado, se debe completar.
+
+* VariableNeighbourhoodDescent: descenso por vecindarios variables. Recorre
+una lista de vecindarios (por ejemplo 2-opt, Or-opt y 3-opt) y vuelve al
+primero cada vez que encuentra una mejora.
+
+* LinKernighan: busqueda de profundidad variable al estilo Lin-Kernighan.
+Encadena movimientos 2-opt guiados por las listas de candidatos del TSP
+mientras la ganancia acumulada sea positiva. Solo sirve para el TSP.
+
+* SimulatedAnnealing: recocido simulado. Evalua movimientos al azar en O(1)
+y acepta los que empeoran con una probabilidad que decrece con la
+temperatura.
+
+* GeneticAlgorithm: algoritmo genetico. Mantiene una poblacion de tours en
+una matriz de numpy y la evalua de una sola vez. Solo sirve para el TSP.
+
+* HeldKarp: algoritmo exacto de programacion dinamica de Held-Karp. Da el
+tour optimo en O(2^n n^2), por lo que solo sirve para instancias chicas
+del TSP (por ejemplo burma14 o ulysses16).
+
+* BranchAndBound: algoritmo exacto de ramificacion y acotacion con cotas de
+1-arbol (Held-Karp, ver el modulo bounds). Sirve para instancias medianas
+del TSP; si se agota el tiempo informa la diferencia con la mejor cota.
 """
 
 
 from __future__ import annotations
+import copy
+import heapq
+import os
+import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from math import exp, isclose, log
 from time import time
+from typing import Callable
+import numpy as np
+import bounds
 from problem import OptProblem
+from stats import Stats, instrument
+from tabu import TabuList
 
 
 class LocalSearch:
-    """Clase que representa un algoritmo de busqueda local general."""
+    """Clase que representa un algoritmo de busqueda local general.
+
+    Todos los algoritmos respetan un presupuesto comun: un tiempo maximo
+    (max_time), una cantidad maxima de iteraciones (max_iters) y un valor
+    objetivo a alcanzar (target). Al agotarse cualquiera de ellos se detienen
+    y devuelven el mejor estado encontrado hasta el momento, aunque no hayan
+    llegado a su propio criterio de parada.
+
+    Los resultados son "anytime": cada vez que se encuentra un estado mejor
+    que todos los anteriores se agrega (segundos desde el inicio, valor) a
+    history y, si se paso un callback, se lo llama con
+    callback(segundos, valor, tour).
+
+    Con profile() en lugar de solve() se miden ademas las llamadas al
+    problema, los sucesores evaluados y el tiempo de evaluacion, que quedan
+    en stats (ver el modulo stats).
+    """
+
+    def __init__(self, neighbourhood: str | None = None, check_every: int = 0,
+                 max_time: float | None = None, max_iters: int | None = None,
+                 target: float | None = None,
+                 callback: Callable[[float, float, list], None] | None = None) -> None:
+        """Construye una instancia de la clase.
 
-    def __init__(self) -> None:
-        """Construye una instancia de la clase."""
+        Argumentos:
+        ==========
+        neighbourhood: str | None
+            vecindario que se pasa a problem.max_action() (por ejemplo "2opt",
+            "oropt" o "3opt" en el TSP). Si es None se usa el del problema.
+        check_every: int
+            modo de depuracion. Los algoritmos llevan el valor objetivo del
+            estado actual de forma incremental (sumando la diferencia de cada
+            movimiento). Si check_every > 0, cada check_every iteraciones se
+            compara ese valor con problem.obj_val() para detectar desvios.
+        max_time: float | None
+            tiempo maximo en segundos (None: sin limite)
+        max_iters: int | None
+            cantidad maxima de iteraciones (None: sin limite)
+        target: float | None
+            valor objetivo a partir del cual se detiene la busqueda (en el
+            TSP, el opuesto del largo buscado)
+        callback: Callable[[float, float, list], None] | None
+            funcion a la que se avisa de cada nuevo mejor estado. No se envia
+            a los procesos auxiliares: en los algoritmos paralelos se la llama
+            desde el proceso principal.
+        """
         self.niters = 0  # Numero de iteraciones totales
         self.time = 0  # Tiempo de ejecucion
         self.tour = []  # Solucion, inicialmente vacia
         self.value = None  # Valor objetivo de la solucion
+        self.history = []  # (segundos, valor) de cada nuevo mejor estado
+        self.stats = None  # Estadisticas de la ultima llamada a profile()
+        self.neighbourhood = neighbourhood
+        self.check_every = check_every
+        self.max_time = max_time
+        self.max_iters = max_iters
+        self.target = target
+        self.callback = callback
+        self._start = 0.0  # Inicio del reloj de la ultima llamada a solve()
+        self._deadline = None  # Instante en que se agota max_time
+
+    def __getstate__(self) -> dict:
+        """Estado para pickle y copy, sin el callback (que suele ser una funcion local)."""
+        state = self.__dict__.copy()
+        state["callback"] = None
+        return state
 
     def solve(self, problem: OptProblem):
         """Resuelve un problema de optimizacion."""
         self.tour = problem.init
         self.value = problem.obj_val(problem.init)
 
+    def profile(self, problem: OptProblem, memory: bool = False) -> Stats:
+        """Resuelve un problema como solve(), midiendo estadisticas de la ejecucion.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        memory: bool
+            si es True tambien se mide el pico de memoria (con tracemalloc,
+            que hace mas lenta la ejecucion)
+
+        Retorno:
+        =======
+        stats: Stats
+            estadisticas de la ejecucion, que tambien quedan en self.stats
+        """
+        stats = Stats()
+        with instrument(problem, stats, memory):
+            self.solve(problem)
+        stats.iterations = self.niters
+        stats.total_time = self.time
+        self.stats = stats
+        return stats
+
+    def _begin(self) -> float:
+        """Pone en marcha el reloj y los presupuestos de una llamada a solve().
+
+        Retorna el instante de inicio.
+        """
+        self._start = time()
+        self._deadline = self._start + self.max_time if self.max_time is not None else None
+        self.niters = 0
+        self.history = []
+        return self._start
+
+    def _exhausted(self, value: float | None = None) -> bool:
+        """Determina si se agoto el presupuesto.
+
+        Argumentos:
+        ==========
+        value: float | None
+            mejor valor objetivo encontrado, que se compara con target
+
+        Retorno:
+        =======
+        exhausted: bool
+            True si se alcanzo max_iters, max_time o target
+        """
+        if self.max_iters is not None and self.niters >= self.max_iters:
+            return True
+        if self.target is not None and value is not None and value >= self.target:
+            return True
+        return self._deadline is not None and time() >= self._deadline
+
+    def _record(self, problem: OptProblem, state, value: float) -> None:
+        """Registra state si es mejor que todos los estados anteriores.
+
+        Solo se copia el estado si hay un callback al que avisarle.
+        """
+        if self.history and value <= self.history[-1][1]:
+            return
+        elapsed = time() - self._start
+        self.history.append((elapsed, value))
+        if self.callback is not None:
+            tour = state if isinstance(state, list) else problem.snapshot(state)
+            self.callback(elapsed, value, tour)
+
+    def _check_value(self, problem: OptProblem, state, value: float) -> None:
+        """Verifica el valor objetivo incremental en modo de depuracion.
+
+        Lanza RuntimeError si value no coincide con problem.obj_val(state).
+        """
+        if not self.check_every or self.niters % self.check_every != 0:
+            return
+        real = problem.obj_val(state)
+        if not isclose(value, real, rel_tol=1e-9, abs_tol=1e-6):
+            raise RuntimeError(
+                f"valor incremental {value} distinto de obj_val {real} "
+                f"en la iteracion {self.niters}")
+
 
 class HillClimbing(LocalSearch):
     """Clase que representa un algoritmo de ascension de colinas.
 
     En cada iteracion se mueve al estado sucesor con mejor valor objetivo.
-    El criterio de parada es alcanzar un optimo local.
+    El criterio de parada es alcanzar un optimo local o agotar el presupuesto.
     """
 
     def solve(self, problem: OptProblem):
@@ -52,120 +230,1246 @@ class HillClimbing(LocalSearch):
             un problema de optimizacion
         """
         # Inicio del reloj
-        start = time()
+        start = self._begin()
 
-        # Arrancamos del estado inicial
-        actual = problem.init
+        # Arrancamos del estado inicial (una copia que se modifica en el lugar)
+        actual = problem.mutable(problem.init)
         value = problem.obj_val(problem.init)
+        self._record(problem, actual, value)
 
-        while True:
+        while not self._exhausted(value):
 
             # Buscamos la acción que genera el sucesor con mayor valor objetivo
-            act, succ_val = problem.max_action(actual)
+            act, succ_val = problem.max_action(actual, value=value,
+                                               neighbourhood=self.neighbourhood)
 
-            # Retornar si estamos en un maximo local:
+            # Terminar si estamos en un maximo local:
             # el valor objetivo del sucesor es menor o igual al del estado actual
             if succ_val <= value:
-
-                self.tour = actual
-                self.value = value
-                end = time()
-                self.time = end-start
-                return
+                break
 
             # Sino, nos movemos al sucesor
-            actual = problem.result(actual, act)
+            problem.apply(actual, act)
+            value = succ_val
+            self.niters += 1
+            self._check_value(problem, actual, value)
+            self._record(problem, actual, value)
+
+        self.tour = problem.snapshot(actual)
+        self.value = value
+        end = time()
+        self.time = end-start
+
+
+class HillClimbingFirst(LocalSearch):
+    """Algoritmo de ascension de colinas con primera mejora y don't-look bits.
+
+    Se mantiene una cola de ciudades activas. En cada iteracion se toma una
+    ciudad de la cola y se buscan movimientos alrededor de ella: si alguno
+    mejora se aplica el primero encontrado y se reactivan solo los extremos de
+    las aristas modificadas; si no, la ciudad queda inactiva (su don't-look
+    bit queda prendido). El criterio de parada es que no queden ciudades
+    activas, lo que equivale a alcanzar un optimo local, o agotar el
+    presupuesto.
+
+    Requiere que el problema implemente first_action() y touched(), como TSP.
+    """
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un problema de optimizacion con ascension de colinas con primera mejora.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        # Inicio del reloj
+        start = self._begin()
+
+        # Arrancamos del estado inicial, con todas las ciudades activas
+        actual = problem.mutable(problem.init)
+        value = problem.obj_val(problem.init)
+        self._record(problem, actual, value)
+        pos = problem.positions(actual)  # se actualiza junto con actual
+        active = deque(list(actual)[:-1])
+        queued = [True] * len(pos)
+
+        while active and not self._exhausted(value):
+            city = active.popleft()
+            queued[city] = False
+
+            # Buscamos el primer movimiento alrededor de city que mejora
+            act, succ_val = problem.first_action(actual, city, value, pos)
+            if act is None:
+                continue
+
+            # Nos movemos al sucesor y reactivamos las ciudades afectadas
+            for c in problem.touched(actual, act):
+                if not queued[c]:
+                    queued[c] = True
+                    active.append(c)
+            problem.apply(actual, act)
             value = succ_val
             self.niters += 1
+            self._check_value(problem, actual, value)
+            self._record(problem, actual, value)
+
+        self.tour = problem.snapshot(actual)
+        self.value = value
+        end = time()
+        self.time = end-start
 
 
 class HillClimbingReset(LocalSearch):
-    """Algoritmo de ascension de colinas con reinicio aleatorio."""
+    """Algoritmo de ascension de colinas con reinicio aleatorio.
+
+    Con workers > 1 los reinicios son independientes entre si y se reparten
+    entre varios procesos: el primero arranca del estado inicial y cada uno
+    de los demas de un estado al azar generado con su propia semilla. En ese
+    caso max_time y target se controlan en cada proceso (el limite de tiempo
+    es comun a todos) y max_iters se aplica a cada reinicio por separado y
+    al total de los reinicios terminados.
+
+    Los estados de los reinicios se generan con problem.random_reset(restart):
+    por defecto son permutaciones al azar, pero en el TSP tambien pueden ser
+    construcciones aleatorizadas (ver el modulo construct).
+    """
+
+    # En ar24, a partir de 30 iteraciones el algoritmo da el mismo resultado
+    # (-86585) con cualquier semilla. Con menos iteraciones, el resultado
+    # algunas veces da otros valores.
+    def __init__(self, cantInteraciones: int = 30, neighbourhood: str | None = None,
+                 check_every: int = 0, workers: int | None = 1, seed: int | None = None,
+                 max_time: float | None = None, max_iters: int | None = None,
+                 target: float | None = None, callback: Callable | None = None,
+                 restart: str | None = None):
+        """Construye una instancia de la clase.
 
-    # A partir de 30 iteraciones, el algoritmo da el mismo resultado (-86585)
-    # Con menos iteraciones, el resultado algunas veces da otros valores.
-    def __init__(self, cantInteraciones: int = 30):
-        super().__init__()    
+        Argumentos:
+        ==========
+        cantInteraciones: int
+            cantidad de reinicios
+        workers: int | None
+            cantidad de procesos. Con 1 los reinicios se hacen en secuencia;
+            con None se usa un proceso por nucleo.
+        seed: int | None
+            semilla de los reinicios aleatorios, para poder reproducirlos
+        max_time, max_iters, target, callback:
+            presupuesto y resultados anytime (ver LocalSearch)
+        restart: str | None
+            generador de los reinicios que se pasa a problem.random_reset()
+            (en el TSP, "random" o una clave de construct.CONSTRUCTIONS);
+            con None se usa el del problema por defecto
+        """
+        super().__init__(neighbourhood, check_every, max_time, max_iters, target, callback)
         self.cantInteraciones = cantInteraciones
+        self.workers = workers
+        self.seed = seed
+        self.restart = restart
+
+    def _reset(self, problem: OptProblem):
+        """Genera el estado de un reinicio."""
+        if self.restart is None:
+            return problem.random_reset()
+        return problem.random_reset(self.restart)
+
+    def _climb(self, problem: OptProblem, actual, value: float) -> float:
+        """Asciende desde actual (modificandolo en el lugar) hasta un optimo local.
+
+        Si se agota el presupuesto se detiene antes. Retorna el valor objetivo
+        del ultimo estado alcanzado.
+        """
+        while not self._exhausted(value):
+            act, succ_val = problem.max_action(actual, value=value,
+                                               neighbourhood=self.neighbourhood)
+
+            if succ_val <= value:
+                break
+
+            problem.apply(actual, act)
+            value = succ_val
+            self.niters += 1
+            self._check_value(problem, actual, value)
+            self._record(problem, actual, value)
+        return value
 
     def solve(self, problem: OptProblem):
+        workers = self.workers if self.workers is not None else os.cpu_count()
+        if workers > 1:
+            return self._solve_parallel(problem, workers)
+
         # Inicio del reloj
-        start = time()
+        start = self._begin()
+        if self.seed is not None:
+            random.seed(self.seed)
         
-        actual = problem.init
+        actual = problem.mutable(problem.init)
         value = problem.obj_val(problem.init)
+        self._record(problem, actual, value)
 
-        mejorRecorrido = actual
+        mejorRecorrido = problem.init
         mejorValor = value 
 
         for _ in range(self.cantInteraciones):
-            while True:
-                act, succ_val = problem.max_action(actual)
-                
-                if succ_val <= value:
-                    break
-            
-                actual = problem.result(actual, act)
-                value = succ_val
-                self.niters += 1
+            value = self._climb(problem, actual, value)
             
             if mejorValor < value:
                 mejorValor = value
-                mejorRecorrido = actual
+                mejorRecorrido = problem.snapshot(actual)
             else:
-                actual = problem.random_reset()
-                value = problem.obj_val(actual)
+                reset = self._reset(problem)
+                actual = problem.mutable(reset)
+                value = problem.obj_val(reset)
+
+            if self._exhausted(mejorValor):
+                break
 
         self.tour = mejorRecorrido
         self.value = mejorValor
         end = time()
         self.time = end-start
 
+    def _solve_parallel(self, problem: OptProblem, workers: int):
+        """Resuelve el problema repartiendo los reinicios en varios procesos.
+
+        El problema (con su matriz de distancias) se envia una unica vez a
+        cada proceso, al crearlo; cada tarea solo recibe una semilla. Entre
+        reinicios con el mismo valor se queda con el de menor indice, asi el
+        resultado no depende del orden en que terminan los procesos. Los
+        resultados se recorren en el orden de los reinicios; si se agota el
+        presupuesto se cancelan los reinicios que todavia no empezaron.
+        """
+        start = self._begin()
+        self._record(problem, problem.init, problem.obj_val(problem.init))
+
+        # Una semilla independiente por reinicio; el reinicio 0 usa problem.init
+        seeds = np.random.SeedSequence(self.seed).generate_state(self.cantInteraciones)
+        tasks = [None] + [int(s) for s in seeds[1:]]
+
+        results = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(problem,)) as pool:
+            futures = [pool.submit(_restart, self, task) for task in tasks]
+            for future in futures:
+                tour, value, niters = future.result()
+                results.append((tour, value))
+                self.niters += niters
+                self._record(problem, tour, value)
+                if self._exhausted(self.history[-1][1]):
+                    for f in futures:
+                        f.cancel()
+                    break
+
+        self.tour, self.value = max(results, key=lambda r: r[1])
+        end = time()
+        self.time = end-start
+
+
+# Problema de cada proceso auxiliar (HillClimbingReset y GeneticAlgorithm)
+_worker_problem = None
+
+
+def _init_worker(problem: OptProblem) -> None:
+    """Guarda el problema en el proceso, para no enviarlo en cada tarea."""
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _restart(solver: HillClimbingReset, seed: int | None) -> tuple[list, float, int]:
+    """Ejecuta un reinicio de HillClimbingReset en un proceso.
+
+    Retorna el optimo local, su valor objetivo y la cantidad de iteraciones.
+    """
+    problem = _worker_problem
+    if seed is None:
+        state = problem.init
+    else:
+        random.seed(seed)
+        state = solver._reset(problem)
+    solver.niters = 0
+    actual = problem.mutable(state)
+    value = solver._climb(problem, actual, problem.obj_val(state))
+    return problem.snapshot(actual), value, solver.niters
+
 
 class Tabu(LocalSearch):
     """Algoritmo de busqueda tabu."""
 
-    def __init__(self, cantInteraciones: int = 2000, cantTabu: int = 20):
-        super().__init__()
+    def __init__(self, cantInteraciones: int = 2000, cantTabu: int = 20,
+                 neighbourhood: str | None = None, check_every: int = 0,
+                 max_time: float | None = None, max_iters: int | None = None,
+                 target: float | None = None, callback: Callable | None = None):
+        super().__init__(neighbourhood, check_every, max_time, max_iters, target, callback)
         self.cantInteraciones = cantInteraciones
         self.cantTabu = cantTabu
 
     def solve(self, problem: OptProblem):
-        start = time()
+        start = self._begin()
 
-        current = problem.init
+        current = problem.mutable(problem.init)
+        value = problem.obj_val(problem.init)
+        self._record(problem, current, value)
 
-        best = current
-        best_value = problem.obj_val(current)
+        best = problem.init
+        best_value = value
 
-        tabu_list = []
+        tabu_list = TabuList(self.cantTabu)
 
-        self.niters = 0
         no_mejora = 0
 
-        while no_mejora < self.cantInteraciones:
-            act, succ_val = problem.max_action(current, tabu_list)
+        while no_mejora < self.cantInteraciones and not self._exhausted(best_value):
+            act, succ_val = problem.max_action(current, tabu_list, value,
+                                               self.neighbourhood)
 
-            successor = problem.result(current, act)
+            problem.apply(current, act)
+            value = succ_val
 
             self.niters += 1
+            self._check_value(problem, current, value)
 
+            # Solo se copia el estado cuando se encuentra un nuevo mejor
             if succ_val > best_value:
-                best = successor
+                best = problem.snapshot(current)
                 best_value = succ_val
+                self._record(problem, best, best_value)
 
                 no_mejora = 0
             else:
                 no_mejora += 1
 
-            tabu_list.append(act)
-            
-            if len(tabu_list) > self.cantTabu:
-                tabu_list.pop(0)
-            
-            current = successor
+            tabu_list.add(act)
+
+        self.tour = best
+        self.value = best_value
+        end = time()
+        self.time = end - start
+
+
+class VariableNeighbourhoodDescent(LocalSearch):
+    """Algoritmo de descenso por vecindarios variables (VND).
+
+    En cada iteracion busca la mejor accion en el vecindario actual. Si mejora
+    se mueve al sucesor y vuelve al primer vecindario; si no, pasa al
+    siguiente. El criterio de parada es alcanzar un optimo local en todos
+    los vecindarios o agotar el presupuesto.
+    """
+
+    def __init__(self, neighbourhoods: tuple[str, ...] = ("2opt", "oropt"),
+                 check_every: int = 0, max_time: float | None = None,
+                 max_iters: int | None = None, target: float | None = None,
+                 callback: Callable | None = None):
+        super().__init__(neighbourhoods[0], check_every, max_time, max_iters,
+                         target, callback)
+        self.neighbourhoods = neighbourhoods
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un problema de optimizacion con descenso por vecindarios variables.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        start = self._begin()
+
+        actual = problem.mutable(problem.init)
+        value = problem.obj_val(problem.init)
+        self._record(problem, actual, value)
+
+        level = 0
+        while level < len(self.neighbourhoods) and not self._exhausted(value):
+            act, succ_val = problem.max_action(actual, value=value,
+                                               neighbourhood=self.neighbourhoods[level])
+
+            # Si no hay mejora en este vecindario, pasamos al siguiente
+            if succ_val <= value:
+                level += 1
+                continue
+
+            problem.apply(actual, act)
+            value = succ_val
+            self.niters += 1
+            self._check_value(problem, actual, value)
+            self._record(problem, actual, value)
+            level = 0
+
+        self.tour = problem.snapshot(actual)
+        self.value = value
+        end = time()
+        self.time = end-start
+
+
+class LinKernighan(LocalSearch):
+    """Algoritmo de busqueda de profundidad variable al estilo Lin-Kernighan.
+
+    Para cada ciudad activa t1 y cada vecino t2 de t1 en el tour, se quita la
+    arista (t1,t2) y se construye una cadena de movimientos 2-opt: en cada
+    nivel se agrega una arista (t2,t3) con t3 candidato de t2, se quita la
+    arista (t3,t4) que permite cerrar el tour con (t4,t1) y se continua desde
+    t4. Se exige que la ganancia acumulada sin cerrar sea positiva (criterio
+    de ganancia) y que no se quiten aristas agregadas en la misma cadena.
+    La cadena tiene a lo sumo max_depth movimientos y en el primer nivel se
+    prueban hasta breadth alternativas. Se conserva el prefijo de la cadena
+    con mayor ganancia al cerrar, si es positiva, y se deshace el resto.
+
+    Como HillClimbingFirst, usa don't-look bits: solo se reactivan las
+    ciudades extremo de las aristas modificadas. Requiere un TSP; si no tiene
+    listas de candidatos se calculan con los k vecinos mas cercanos.
+    """
+
+    def __init__(self, max_depth: int = 10, breadth: int = 5, k: int = 8,
+                 check_every: int = 0, max_time: float | None = None,
+                 max_iters: int | None = None, target: float | None = None,
+                 callback: Callable | None = None):
+        super().__init__(None, check_every, max_time, max_iters, target, callback)
+        self.max_depth = max_depth
+        self.breadth = breadth
+        self.k = k
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un TSP con la busqueda de Lin-Kernighan.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            una instancia del TSP
+        """
+        start = self._begin()
+
+        # Las cadenas se arman por ciudad, asi que se pueden invertir los
+        # segmentos mas cortos aunque cambien las posiciones
+        tour = problem.mutable(problem.init, shortest=True)
+        value = problem.obj_val(problem.init)
+        self._record(problem, tour, value)
+        neighbours = problem.neighbours
+        if neighbours is None:
+            neighbours = problem.nearest_neighbours(min(self.k, problem.n - 1))
+        cand = neighbours.tolist()
+        dist = problem.dist.item
 
+        active = deque(list(tour)[:-1])
+        queued = [True] * problem.n
+
+        while active and not self._exhausted(value):
+            t1 = active.popleft()
+            queued[t1] = False
+
+            gain, touched = self._improve(problem, tour, t1, cand, dist)
+            if gain <= 0:
+                continue
+
+            value += gain
+            self.niters += 1
+            self._check_value(problem, tour, value)
+            self._record(problem, tour, value)
+            for c in touched:
+                if not queued[c]:
+                    queued[c] = True
+                    active.append(c)
+
+        self.tour = problem.snapshot(tour)
+        self.value = value
+        end = time()
+        self.time = end-start
+
+    def _improve(self, problem, tour, t1: int, cand: list[list[int]],
+                 dist) -> tuple[float, list[int]]:
+        """Busca una cadena de movimientos que mejore el tour a partir de t1.
+
+        Si la encuentra la deja aplicada en tour y retorna su ganancia y las
+        ciudades afectadas; si no, deja tour como estaba y retorna (0, []).
+        """
+        n = problem.n
+        p1 = int(tour.pos[t1])
+        for t2 in (tour[(p1 + 1) % n], tour[(p1 - 1) % n]):
+            g = dist(t1, t2)  # ganancia acumulada sin cerrar el tour
+            first = self._options(tour, t1, t2, g, cand, dist, set())
+            problem.evaluations += len(first)
+            for _, t3, t4, act in first[:self.breadth]:
+                applied = [act]
+                touched = [t1, t2, t3, t4]
+                added = {frozenset((t2, t3))}
+                gain = g - dist(t2, t3) + dist(t3, t4)
+                best_gain = gain - dist(t4, t1)
+                best_len = 1
+                problem.apply(tour, act)
+
+                # Profundizamos con la mejor opcion de cada nivel
+                last = t4
+                while len(applied) < self.max_depth:
+                    options = self._options(tour, t1, last, gain, cand, dist, added)
+                    problem.evaluations += len(options)
+                    if not options:
+                        break
+                    _, t3, t4, act = options[0]
+                    gain = gain - dist(last, t3) + dist(t3, t4)
+                    problem.apply(tour, act)
+                    applied.append(act)
+                    touched.extend((last, t3, t4))
+                    added.add(frozenset((last, t3)))
+                    last = t4
+                    closing = gain - dist(t4, t1)
+                    if closing > best_gain:
+                        best_gain = closing
+                        best_len = len(applied)
+
+                # Deshacemos los movimientos que no conviene conservar
+                # (aplicar dos veces la misma accion 2-opt deja el tour igual)
+                keep = best_len if best_gain > 0 else 0
+                for act in reversed(applied[keep:]):
+                    problem.apply(tour, act)
+                if keep:
+                    return best_gain, touched[:1 + 3 * keep]
+        return 0, []
+
+    def _options(self, tour, t1: int, t2: int, gain: float, cand: list[list[int]],
+                 dist, added: set) -> list[tuple[float, int, int, tuple[int, int]]]:
+        """Determina las opciones para el siguiente nivel de la cadena.
+
+        Cada opcion es (ganancia parcial, t3, t4, accion 2-opt), donde la accion
+        quita (t1,t2) y (t3,t4) y agrega (t2,t3) y (t4,t1). Se ordenan de la
+        mejor a la peor ganancia parcial.
+        """
+        n = len(tour) - 1
+        pos = tour.pos
+        p1 = int(pos[t1])
+        step = 1 if tour[(p1 + 1) % n] == t2 else -1
+        options = []
+        for t3 in cand[t2]:
+            g1 = gain - dist(t2, t3)
+            if g1 <= 0 or t3 == t1:
+                continue
+            q = int(pos[t3])
+            t4 = tour[(q - step) % n]
+            if frozenset((t3, t4)) in added:
+                continue
+            if step == 1:
+                i, j = sorted((p1, q - 1 if q > 0 else n - 1))
+            else:
+                i, j = sorted((int(pos[t2]), q))
+            if j < i + 2 or (i == 0 and j == n - 1):
+                continue
+            options.append((g1 + dist(t3, t4), t3, t4, (i, j)))
+        options.sort(key=lambda o: o[0], reverse=True)
+        return options
+
+
+class SimulatedAnnealing(LocalSearch):
+    """Algoritmo de recocido simulado.
+
+    En cada iteracion elige una accion al azar (de uno de los vecindarios,
+    tambien al azar), calcula en O(1) la diferencia d de valor objetivo que
+    produce y la acepta si d >= 0 o, si empeora, con probabilidad exp(d/T).
+    No se recorre el vecindario con max_action.
+
+    La temperatura T se actualiza al final de cada epoca (epoch iteraciones):
+    * "geometric": T = alpha * T.
+    * "adaptive": T = T * exp(-lam * T / sigma), donde sigma es el desvio
+      estandar de los valores objetivo de la epoca (Huang et al., 1986).
+      Enfria rapido cuando el valor casi no varia y lento cuando varia mucho.
+
+    El criterio de parada es agotar el presupuesto (max_iters iteraciones,
+    max_time segundos o alcanzar target) o que T baje de t_min, lo que
+    ocurra primero.
+    """
+
+    SCHEDULES = ("geometric", "adaptive")
+
+    def __init__(self, neighbourhoods: tuple[str, ...] = ("2opt", "oropt"),
+                 schedule: str = "geometric", t0: float | None = None,
+                 alpha: float = 0.95, lam: float = 0.7, epoch: int | None = None,
+                 t_min: float | None = None, max_iters: int | None = 200_000,
+                 max_time: float | None = None, seed: int | None = None,
+                 check_every: int = 0, target: float | None = None,
+                 callback: Callable | None = None):
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        neighbourhoods: tuple[str, ...]
+            vecindarios de los que se eligen las acciones al azar
+        schedule: str
+            esquema de enfriamiento, "geometric" o "adaptive"
+        t0: float | None
+            temperatura inicial. Si es None se estima para que un
+            empeoramiento promedio se acepte con probabilidad 1/2.
+        alpha: float
+            factor de enfriamiento del esquema geometrico
+        lam: float
+            parametro del esquema adaptativo
+        epoch: int | None
+            iteraciones por temperatura (por defecto, 10 * n)
+        t_min: float | None
+            temperatura minima (por defecto, t0 / 10000)
+        max_iters: int | None
+            cantidad maxima de iteraciones
+        max_time: float | None
+            tiempo maximo en segundos
+        seed: int | None
+            semilla del generador de numeros al azar
+        target, callback:
+            valor objetivo y resultados anytime (ver LocalSearch)
+        """
+        super().__init__(neighbourhoods[0], check_every, max_time, max_iters,
+                         target, callback)
+        if schedule not in self.SCHEDULES:
+            raise ValueError(f"esquema de enfriamiento desconocido: {schedule!r}")
+        self.neighbourhoods = neighbourhoods
+        self.schedule = schedule
+        self.t0 = t0
+        self.alpha = alpha
+        self.lam = lam
+        self.epoch = epoch
+        self.t_min = t_min
+        self.seed = seed
+
+    def _initial_temperature(self, problem: OptProblem, state, rng: random.Random) -> float:
+        """Estima la temperatura inicial con una muestra de acciones al azar."""
+        worse = []
+        for _ in range(200):
+            nb = rng.choice(self.neighbourhoods)
+            act = problem.random_action(state, nb, rng)
+            if act is None:
+                break
+            d = problem.delta(state, act)
+            if d < 0:
+                worse.append(-d)
+        if not worse:
+            return 1.0
+        return sum(worse) / len(worse) / log(2)
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un problema de optimizacion con recocido simulado.
+
+        Argumentos:
+        ==========
+        problem: OptProblem
+            un problema de optimizacion
+        """
+        start = self._begin()
+        rng = random.Random(self.seed)
+
+        # Las acciones se eligen al azar por ciudad, asi que se pueden mover
+        # los segmentos mas cortos aunque cambien las posiciones
+        actual = problem.mutable(problem.init, shortest=True)
+        value = problem.obj_val(problem.init)
+        self._record(problem, actual, value)
+        best = problem.init
+        best_value = value
+        pending = False  # actual es un mejor estado que todavia no se copio
+
+        temp = self.t0 if self.t0 is not None else self._initial_temperature(problem, actual, rng)
+        t_min = self.t_min if self.t_min is not None else temp / 10000
+        epoch = self.epoch or 10 * (len(problem.init) - 1)
+        max_iters = self.max_iters if self.max_iters is not None else float("inf")
+        epoch_sum = epoch_sq = 0.0
+        epoch_len = 0
+
+        while self.niters < max_iters and temp > t_min:
+            # Las iteraciones son muy baratas: el reloj y target se consultan
+            # cada 64 iteraciones
+            if self.niters % 64 == 0 and self._exhausted(best_value):
+                break
+            nb = rng.choice(self.neighbourhoods)
+            act = problem.random_action(actual, nb, rng)
+            if act is None:
+                break
+            d = problem.delta(actual, act)
+            self.niters += 1
+
+            if d >= 0 or rng.random() < exp(d / temp):
+                # Antes de alejarnos de un mejor estado, lo copiamos
+                if pending and d < 0:
+                    best = problem.snapshot(actual)
+                    pending = False
+                problem.apply(actual, act)
+                value += d
+                self._check_value(problem, actual, value)
+                if value > best_value:
+                    best_value = value
+                    pending = True
+                    self._record(problem, actual, value)
+
+            epoch_sum += value
+            epoch_sq += value * value
+            epoch_len += 1
+            if epoch_len == epoch:
+                temp = self._cool(temp, epoch_sum, epoch_sq, epoch_len)
+                epoch_sum = epoch_sq = 0.0
+                epoch_len = 0
+
+        if pending:
+            best = problem.snapshot(actual)
         self.tour = best
         self.value = best_value
         end = time()
-        self.time = end - start
\ No newline at end of file
+        self.time = end-start
+
+    def _cool(self, temp: float, total: float, squares: float, count: int) -> float:
+        """Calcula la temperatura de la epoca siguiente."""
+        if self.schedule == "adaptive":
+            mean = total / count
+            sigma = max(squares / count - mean * mean, 0.0) ** 0.5
+            if sigma > 0:
+                return temp * exp(-self.lam * temp / sigma)
+        return temp * self.alpha
+
+
+class GeneticAlgorithm(LocalSearch):
+    """Algoritmo genetico para el TSP.
+
+    La poblacion es una matriz de numpy (pop_size, n) con un tour por fila y
+    sus valores objetivo se calculan todos juntos con problem.batch_obj_val().
+    En cada generacion:
+    * se eligen los padres por torneo,
+    * se cruzan con el cruce por orden (OX) con probabilidad crossover,
+    * cada hijo se muta con probabilidad mutation invirtiendo un segmento
+      al azar (un movimiento 2-opt),
+    * opcionalmente, los improve mejores hijos se mejoran con una busqueda
+      local (improver), en varios procesos si workers > 1,
+    * la nueva poblacion son los elite mejores de la anterior y los mejores
+      hijos.
+    Con la misma semilla el resultado es reproducible (salvo que se agote
+    max_time). El presupuesto se controla al final de cada generacion, que
+    cuenta como una iteracion.
+    """
+
+    def __init__(self, pop_size: int = 100, generations: int = 200,
+                 crossover: float = 0.9, mutation: float = 0.2,
+                 tournament: int = 3, elite: int = 2,
+                 improver: LocalSearch | None = None, improve: int = 0,
+                 workers: int | None = 1, seed: int | None = None,
+                 max_time: float | None = None, max_iters: int | None = None,
+                 target: float | None = None, callback: Callable | None = None):
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        pop_size: int
+            tamaño de la poblacion
+        generations: int
+            cantidad de generaciones
+        crossover: float
+            probabilidad de cruzar dos padres (si no, el hijo es el primero)
+        mutation: float
+            probabilidad de mutar un hijo
+        tournament: int
+            cantidad de individuos de cada torneo
+        elite: int
+            cantidad de mejores individuos que pasan a la generacion siguiente
+        improver: LocalSearch | None
+            busqueda local con la que se mejoran los hijos (por ejemplo
+            LinKernighan()). Se ejecuta sobre una copia del problema cuyo
+            estado inicial es el hijo.
+        improve: int
+            cantidad de hijos que se mejoran en cada generacion
+        workers: int | None
+            cantidad de procesos para la mejora (None: uno por nucleo)
+        seed: int | None
+            semilla del generador de numeros al azar
+        max_time, max_iters, target, callback:
+            presupuesto y resultados anytime (ver LocalSearch)
+        """
+        super().__init__(None, 0, max_time, max_iters, target, callback)
+        self.pop_size = pop_size
+        self.generations = generations
+        self.crossover = crossover
+        self.mutation = mutation
+        self.tournament = tournament
+        self.elite = elite
+        self.improver = improver
+        self.improve = improve
+        self.workers = workers
+        self.seed = seed
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un TSP con un algoritmo genetico.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            una instancia del TSP
+        """
+        start = self._begin()
+        rng = np.random.default_rng(self.seed)
+        n = len(problem.init) - 1
+
+        # Poblacion inicial: el estado inicial y tours al azar
+        pop = np.empty((self.pop_size, n), dtype=np.int32)
+        pop[0] = problem.init[:-1]
+        for r in range(1, self.pop_size):
+            pop[r] = rng.permutation(n)
+        fit = problem.batch_obj_val(pop)
+        self._record_best(problem, pop, fit)
+
+        workers = self.workers if self.workers is not None else os.cpu_count()
+        pool = None
+        if self.improver is not None and self.improve > 0 and workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(problem,))
+        try:
+            for _ in range(self.generations):
+                if self._exhausted(fit.max().item()):
+                    break
+                children = self._offspring(pop, fit, rng)
+                child_fit = problem.batch_obj_val(children)
+                if self.improver is not None and self.improve > 0:
+                    self._improve(problem, children, child_fit, pool)
+
+                # Reemplazo: elite de la poblacion anterior y los mejores hijos
+                keep = np.argsort(-fit, kind='stable')[:self.elite]
+                take = np.argsort(-child_fit, kind='stable')[:self.pop_size - len(keep)]
+                pop = np.concatenate((pop[keep], children[take]))
+                fit = np.concatenate((fit[keep], child_fit[take]))
+                self.niters += 1
+                self._record_best(problem, pop, fit)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        best = int(np.argmax(fit))
+        self.tour = _closed_tour(pop[best])
+        self.value = fit[best].item()
+        end = time()
+        self.time = end-start
+
+    def _record_best(self, problem: OptProblem, pop: np.ndarray, fit: np.ndarray) -> None:
+        """Registra el mejor individuo de la poblacion si mejora al anterior."""
+        best = int(np.argmax(fit))
+        self._record(problem, _closed_tour(pop[best]), fit[best].item())
+
+    def _offspring(self, pop: np.ndarray, fit: np.ndarray,
+                   rng: np.random.Generator) -> np.ndarray:
+        """Genera pop_size hijos por torneo, cruce OX y mutacion 2-opt."""
+        size, n = pop.shape
+        # Torneos: para cada padre se elige el mejor de tournament individuos
+        entrants = rng.integers(size, size=(2 * size, self.tournament))
+        winners = entrants[np.arange(2 * size), np.argmax(fit[entrants], axis=1)]
+        parents = pop[winners].reshape(size, 2, n)
+
+        children = parents[:, 0].copy()
+        cross = rng.random(size) < self.crossover
+        for r in np.flatnonzero(cross):
+            children[r] = _order_crossover(parents[r, 0], parents[r, 1], rng)
+        for r in np.flatnonzero(rng.random(size) < self.mutation):
+            i, j = np.sort(rng.choice(n, 2, replace=False))
+            children[r, i:j + 1] = children[r, i:j + 1][::-1]
+        return children
+
+    def _improve(self, problem: OptProblem, children: np.ndarray,
+                 child_fit: np.ndarray, pool: ProcessPoolExecutor | None) -> None:
+        """Mejora en el lugar los improve mejores hijos con la busqueda local."""
+        chosen = np.argsort(-child_fit, kind='stable')[:self.improve]
+        tours = [children[r].tolist() for r in chosen]
+        tours = [t + [t[0]] for t in tours]
+        if pool is not None:
+            results = list(pool.map(partial(_improve_tour, self.improver), tours))
+        else:
+            results = [_improve_tour(self.improver, t, problem) for t in tours]
+        for r, (tour, value) in zip(chosen, results):
+            children[r] = tour[:-1]
+            child_fit[r] = value
+
+
+def _closed_tour(perm: np.ndarray) -> list[int]:
+    """Convierte una permutacion de las ciudades en un estado que empieza y termina en 0."""
+    k = int(np.flatnonzero(perm == 0)[0])
+    tour = np.roll(perm, -k).tolist()
+    return tour + [tour[0]]
+
+
+def _order_crossover(p1: np.ndarray, p2: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Cruce por orden (OX).
+
+    El hijo copia el segmento [a,...,b] de p1 y completa el resto de las
+    posiciones, empezando despues de b, con las ciudades que faltan en el
+    orden en que aparecen en p2 (tambien empezando despues de b).
+    """
+    n = len(p1)
+    a, b = np.sort(rng.choice(n, 2, replace=False))
+    child = np.empty_like(p1)
+    child[a:b + 1] = p1[a:b + 1]
+    used = np.zeros(n, dtype=bool)
+    used[p1[a:b + 1]] = True
+    rest = np.roll(p2, -(b + 1))
+    rest = rest[~used[rest]]
+    child[np.arange(b + 1, b + 1 + len(rest)) % n] = rest
+    return child
+
+
+def _improve_tour(solver: LocalSearch, tour: list[int],
+                  problem: OptProblem | None = None) -> tuple[list[int], float]:
+    """Mejora un tour con una busqueda local (en un proceso auxiliar, si problem es None).
+
+    Retorna el tour mejorado y su valor objetivo.
+    """
+    problem = copy.copy(problem if problem is not None else _worker_problem)
+    problem.init = tour
+    solver = copy.copy(solver)
+    solver.niters = 0
+    solver.solve(problem)
+    return solver.tour, solver.value
+
+
+class HeldKarp(LocalSearch):
+    """Algoritmo exacto de Held-Karp (programacion dinamica sobre subconjuntos).
+
+    Para cada subconjunto S de las ciudades 1,...,n-1 (un entero de n-1
+    bits) y cada ciudad j de S, dp[S, j] es el largo del camino mas corto
+    que sale de 0, visita todas las ciudades de S y termina en j:
+
+        dp[{j}, j] = dist[0][j]
+        dp[S, j] = min_{i en S - {j}} dp[S - {j}, i] + dist[i][j]
+
+    y el tour optimo mide min_j dp[{1,...,n-1}, j] + dist[j][0]. La tabla es
+    una matriz de numpy de 2^(n-1) filas indexada por la mascara de bits; los
+    subconjuntos se procesan por tamaño y, para cada ultima ciudad j, todas
+    las transiciones de un tamaño se calculan de una vez.
+
+    La tabla ocupa unos 9 * 2^(n-1) * (n-1) bytes (unos 90 MB con n = 20),
+    por lo que se rechazan las instancias con mas de max_n ciudades. Las
+    iteraciones son los pares (S, j) calculados; el presupuesto se consulta
+    entre un tamaño de subconjunto y el siguiente. Como el tour recien se
+    conoce al terminar la tabla, si se agota el presupuesto antes (o el
+    estado inicial ya alcanza target) el resultado es el estado inicial.
+    Solo sirve para el TSP.
+    """
+
+    # Cantidad maxima de ciudades por defecto
+    MAX_N = 20
+
+    def __init__(self, max_n: int = MAX_N, max_time: float | None = None,
+                 max_iters: int | None = None, target: float | None = None,
+                 callback: Callable | None = None):
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        max_n: int
+            cantidad maxima de ciudades; con mas se lanza ValueError
+        max_time, max_iters, target, callback:
+            presupuesto y resultados anytime (ver LocalSearch)
+        """
+        super().__init__(None, 0, max_time, max_iters, target, callback)
+        self.max_n = max_n
+        self.optimal = False  # True si la ultima llamada a solve() termino
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un TSP de forma exacta.
+
+        Argumentos:
+        ==========
+        problem: TSP
+            una instancia del TSP con a lo sumo max_n ciudades
+
+        Lanza ValueError si la instancia tiene mas de max_n ciudades.
+        """
+        n = problem.n
+        if n > self.max_n:
+            raise ValueError(f"Held-Karp admite hasta {self.max_n} ciudades "
+                             f"y la instancia tiene {n}")
+        start = self._begin()
+        self.optimal = False
+        self.tour = problem.init
+        self.value = problem.obj_val(problem.init)
+        self._record(problem, self.tour, self.value)
+
+        if n > 2:
+            tour = self._dp(problem)
+            if tour is not None:
+                self.tour = tour
+                self.value = problem.obj_val(tour)
+                self.optimal = True
+                self._record(problem, self.tour, self.value)
+        else:
+            self.optimal = True
+
+        end = time()
+        self.time = end-start
+
+    def _dp(self, problem: OptProblem) -> list[int] | None:
+        """Calcula la tabla de Held-Karp y reconstruye el tour optimo.
+
+        Retorna None si se agota el presupuesto antes de terminar.
+        """
+        n = problem.n
+        cities = np.arange(n)
+        dist = problem.dist.pairs(cities[:, None], cities[None, :]).astype(np.float64)
+        m = n - 1  # la ciudad c (1 <= c <= n-1) es el bit c-1
+        size = 1 << m
+        masks = np.arange(size)
+        dp = np.full((size, m), np.inf)
+        parent = np.full((size, m), -1, dtype=np.int8)
+        dp[1 << np.arange(m), np.arange(m)] = dist[0, 1:]
+
+        # Subconjuntos ordenados por tamaño
+        count = np.zeros(size, dtype=np.int8)
+        for b in range(m):
+            count += (masks >> b) & 1
+        by_size = np.argsort(count, kind='stable')
+        bounds = np.searchsorted(count[by_size], np.arange(m + 2))
+
+        step = dist[1:, 1:]
+        for k in range(2, m + 1):
+            if self._exhausted(self.value):
+                problem.evaluations += self.niters * m
+                return None
+            subsets = by_size[bounds[k]:bounds[k + 1]]
+            for j in range(m):
+                S = subsets[(subsets >> j) & 1 == 1]
+                cand = dp[S ^ (1 << j)] + step[:, j]
+                best = np.argmin(cand, axis=1)
+                dp[S, j] = cand[np.arange(len(S)), best]
+                parent[S, j] = best
+                self.niters += len(S)
+        problem.evaluations += self.niters * m
+
+        # Reconstruir el tour desde el final
+        S = size - 1
+        j = int(np.argmin(dp[S] + dist[1:, 0]))
+        path = []
+        while S:
+            path.append(j + 1)
+            S, j = S ^ (1 << j), int(parent[S, j])
+        path.append(0)
+        path.reverse()
+        path.append(0)
+        return path
+
+
+class BranchAndBound(LocalSearch):
+    """Algoritmo exacto de ramificacion y acotacion (branch and bound) para el TSP.
+
+    Cada nodo del arbol de busqueda es un conjunto de aristas obligatorias y
+    prohibidas, y se acota con la cota de Held-Karp (1-arbol minimo con
+    potenciales, ver bounds.held_karp_bound) de los tours que las respetan.
+    Los hijos arrancan el subgradiente desde los potenciales del padre. Se
+    ramifica en una ciudad v de grado mayor a 2 en el 1-arbol, con dos de sus
+    aristas libres e1 y e2 del arbol: un hijo prohibe e1, otro obliga e1 y
+    prohibe e2 y otro obliga las dos (Volgenant y Jonker). Los nodos se
+    exploran de menor a mayor cota.
+
+    Para podar:
+    * la solucion inicial (incumbente) es el mejor tour entre el estado
+      inicial y el que devuelve heuristic (por defecto LinKernighan);
+    * con distancias enteras la cota se redondea hacia arriba;
+    * en la raiz se descartan las aristas que no pueden estar en ningun tour
+      mejor que el incumbente (bounds.eliminable_edges);
+    * al obligar dos aristas de una ciudad se prohiben las demas, y se
+      prohibe la arista que cerraria un subtour con las obligatorias.
+
+    Las iteraciones son los nodos explorados y el presupuesto (max_time,
+    max_iters y target, comparado con el incumbente) se consulta antes de
+    explorar cada uno.
+
+    Al terminar, lower_bound es la mejor cota inferior del largo del tour
+    optimo y gap la diferencia porcentual entre el tour encontrado y esa
+    cota, relativa a la cota (como main.bound_gap); si se exploro todo el
+    arbol, optimal es True y gap es 0. Solo
+    sirve para el TSP.
+    """
+
+    # Cantidad maxima de ciudades por defecto
+    MAX_N = 100
+
+    def __init__(self, heuristic: LocalSearch | None = None, root_iters: int = 1000,
+                 node_iters: int = 50, max_n: int = MAX_N,
+                 max_time: float | None = None, max_iters: int | None = None,
+                 target: float | None = None, callback: Callable | None = None):
+        """Construye una instancia de la clase.
+
+        Argumentos:
+        ==========
+        heuristic: LocalSearch | None
+            busqueda local que da el incumbente inicial (None: LinKernighan)
+        root_iters: int
+            iteraciones del subgradiente en la raiz
+        node_iters: int
+            iteraciones del subgradiente en los demas nodos
+        max_n: int
+            cantidad maxima de ciudades; con mas se lanza ValueError
+        max_time, max_iters, target, callback:
+            presupuesto y resultados anytime (ver LocalSearch)
+        """
+        super().__init__(None, 0, max_time, max_iters, target, callback)
+        self.heuristic = heuristic
+        self.root_iters = root_iters
+        self.node_iters = node_iters
+        self.max_n = max_n
+        self.lower_bound = None  # Mejor cota inferior del largo optimo
+        self.gap = None  # Diferencia porcentual entre el tour y la cota
+        self.optimal = False  # True si se demostro que el tour es optimo
+
+    def solve(self, problem: OptProblem):
+        """Resuelve un TSP de forma exacta (o hasta agotar el tiempo).
+
+        Argumentos:
+        ==========
+        problem: TSP
+            una instancia del TSP con a lo sumo max_n ciudades
+
+        Lanza ValueError si la instancia tiene mas de max_n ciudades.
+        """
+        n = problem.n
+        if n > self.max_n:
+            raise ValueError(f"branch and bound admite hasta {self.max_n} ciudades "
+                             f"y la instancia tiene {n}")
+        start = self._begin()
+
+        # Incumbente: el mejor entre el estado inicial y la heuristica
+        self.tour = problem.init
+        self.value = problem.obj_val(problem.init)
+        self._record(problem, self.tour, self.value)
+        if n > 3:
+            heuristic = copy.copy(self.heuristic or LinKernighan())
+            heuristic.solve(problem)
+            if heuristic.value > self.value:
+                self.tour, self.value = heuristic.tour, heuristic.value
+                self._record(problem, self.tour, self.value)
+            self._branch(problem)
+        else:
+            self.lower_bound = float(-self.value)
+        upper = -self.value
+        self.optimal = self.lower_bound >= upper
+        if self.optimal or self.lower_bound <= 0:
+            self.gap = 0.0
+        else:
+            self.gap = 100 * (upper - self.lower_bound) / self.lower_bound
+
+        end = time()
+        self.time = end-start
+
+    def _bound(self, dist: np.ndarray, fixed: np.ndarray, pi: np.ndarray,
+               iters: int, step: float) -> tuple[float, np.ndarray, np.ndarray | None]:
+        """Cota de un nodo; con distancias enteras se redondea hacia arriba."""
+        lb, pi, edges = bounds.held_karp_bound(dist, -self.value, pi, iters, step, fixed)
+        if self._integral and lb != np.inf:
+            lb = np.ceil(lb - 1e-6)
+        return lb, pi, edges
+
+    def _branch(self, problem: OptProblem) -> None:
+        """Recorre el arbol de busqueda y deja la mejor cota en lower_bound."""
+        n = problem.n
+        cities = np.arange(n)
+        dist = problem.dist.pairs(cities[:, None], cities[None, :]).astype(np.float64)
+        self._integral = np.issubdtype(problem.dist.dtype, np.integer)
+
+        root = np.zeros((n, n), dtype=np.int8)
+        lb, pi, edges = self._bound(dist, root, None, self.root_iters, 2.0)
+        if edges is not None and lb < -self.value:
+            root[bounds.eliminable_edges(dist, pi, edges, lb, -self.value)] = -1
+        heap = [(lb, 0, root, pi, edges)]
+        count = 1
+        while heap:
+            if self._exhausted(self.value):
+                break
+            lb, _, fixed, pi, edges = heapq.heappop(heap)
+            if lb >= -self.value:
+                continue
+            self.niters += 1
+            degree = np.bincount(edges.ravel(), minlength=n)
+            if degree.max() == 2:
+                self._update(problem, edges)
+                continue
+            for child in self._children(fixed, edges, degree, dist):
+                clb, cpi, cedges = self._bound(dist, child, pi, self.node_iters, 0.5)
+                problem.evaluations += 1
+                if clb >= -self.value:
+                    continue
+                if np.bincount(cedges.ravel(), minlength=n).max() == 2:
+                    self._update(problem, cedges)
+                    continue
+                heapq.heappush(heap, (clb, count, child, cpi, cedges))
+                count += 1
+        # La cota global es la menor entre los nodos sin explorar
+        pending = [entry[0] for entry in heap if entry[0] < -self.value]
+        self.lower_bound = float(min(pending, default=-self.value))
+
+    def _children(self, fixed: np.ndarray, edges: np.ndarray, degree: np.ndarray,
+                  dist: np.ndarray) -> list[np.ndarray]:
+        """Restricciones de los hijos de un nodo (sin los que no tienen tours)."""
+        v = int(np.argmax(degree))
+        free = [int(u) for a, b in edges.tolist() for u in (a, b)
+                if v in (a, b) and u != v and fixed[v, u] == 0]
+        free.sort(key=lambda u: (dist[v, u], u))
+        e1, e2 = free[0], free[1]
+        specs = [((), ((v, e1),)), (((v, e1),), ((v, e2),))]
+        if (fixed[v] == 1).sum() == 0:
+            specs.append((((v, e1), (v, e2)), ()))
+        children = []
+        for forced, forbidden in specs:
+            child = fixed.copy()
+            for a, b in forbidden:
+                child[a, b] = child[b, a] = -1
+            ok = True
+            for a, b in forced:
+                child[a, b] = child[b, a] = 1
+                ok = ok and _propagate(child)
+            if ok:
+                children.append(child)
+        return children
+
+    def _update(self, problem: OptProblem, edges: np.ndarray) -> None:
+        """Actualiza el incumbente con un 1-arbol que es un tour."""
+        n = problem.n
+        adj = [[] for _ in range(n)]
+        for a, b in edges.tolist():
+            adj[a].append(b)
+            adj[b].append(a)
+        tour = [0, adj[0][0]]
+        while len(tour) < n:
+            a, b = adj[tour[-1]]
+            tour.append(a if a != tour[-2] else b)
+        tour.append(0)
+        value = problem.obj_val(tour)
+        if value > self.value:
+            self.tour, self.value = tour, value
+            self._record(problem, tour, value)
+
+
+def _propagate(fixed: np.ndarray) -> bool:
+    """Completa las restricciones implicadas por las aristas obligatorias.
+
+    Prohibe las demas aristas de las ciudades con dos aristas obligatorias y
+    la arista que une los extremos de cada camino de aristas obligatorias
+    (cerraria un subtour). Retorna False si las obligatorias no pueden estar
+    en un tour (una ciudad con tres, o un ciclo que no pasa por todas).
+    """
+    n = len(fixed)
+    forced = fixed == 1
+    degree = forced.sum(axis=1)
+    if degree.max() > 2:
+        return False
+    full = degree == 2
+    fixed[full] = np.where(forced[full], 1, -1)
+    fixed[:, full] = np.where(forced[:, full], 1, -1)
+    np.fill_diagonal(fixed, 0)
+
+    # Recorrer cada camino de aristas obligatorias desde un extremo
+    seen = np.zeros(n, dtype=bool)
+    for s in np.flatnonzero(degree == 1).tolist():
+        if seen[s]:
+            continue
+        prev, cur, length = -1, s, 0
+        seen[s] = True
+        while True:
+            nxt = [u for u in np.flatnonzero(forced[cur]).tolist() if u != prev]
+            if not nxt:
+                break
+            prev, cur = cur, nxt[0]
+            seen[cur] = True
+            length += 1
+        if 1 < length < n - 1:
+            fixed[s, cur] = fixed[cur, s] = -1
+    # Las ciudades de grado 2 que no estan en un camino forman ciclos, y
+    # solo se admite uno si pasa por todas las ciudades
+    rest = np.flatnonzero(full & ~seen)
+    if len(rest) == 0:
+        return True
+    prev, cur, length = -1, int(rest[0]), 0
+    while True:
+        a, b = np.flatnonzero(forced[cur]).tolist()
+        prev, cur = cur, (a if a != prev else b)
+        length += 1
+        if cur == rest[0]:
+            return length == n
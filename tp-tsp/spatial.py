@@ -0,0 +1,230 @@
+"""Este modulo define la clase GridIndex.
+
+GridIndex es un indice espacial sobre las coordenadas de las ciudades:
+divide el rectangulo que las contiene en una grilla de celdas cuadradas,
+con unas pocas ciudades por celda, y guarda las ciudades ordenadas por
+celda. Una consulta solo mira las celdas cercanas al punto consultado,
+por lo que construir las listas de candidatos de todas las ciudades cuesta
+O(n log n) en lugar de O(n^2).
+
+Las consultas se hacen por lotes y de forma vectorizada con numpy:
+
+* knn(): los k puntos mas cercanos a cada consulta. Se revisan las celdas
+a distancia (de celdas) r de la celda de la consulta; si el k-esimo
+encontrado esta a menor distancia que el borde de ese bloque el resultado
+es exacto, y si no se repite con un bloque mas grande.
+
+* radius(): los puntos a distancia a lo sumo radius de cada consulta.
+
+Las distancias son euclideas sobre las coordenadas, igual que las listas de
+candidatos de problem.TSP. Entre puntos a la misma distancia se prefiere el
+de menor indice.
+
+Requiere del paquete numpy.
+"""
+
+from __future__ import annotations
+import math
+import numpy as np
+
+# Cantidad de pares (consulta, punto) que se revisan por lote, para acotar
+# la memoria auxiliar
+BATCH_PAIRS = 1 << 21
+
+
+class GridIndex:
+    """Indice espacial de grilla uniforme sobre un arreglo de coordenadas."""
+
+    def __init__(self, coords: np.ndarray, leaf_size: float = 2.0) -> None:
+        """Construye el indice.
+
+        Argumentos:
+        ==========
+        coords: np.ndarray
+            matriz (n, 2) con las coordenadas de cada punto
+        leaf_size: float
+            cantidad promedio de puntos por celda
+        """
+        self.coords = np.asarray(coords, dtype=np.float64)
+        n = len(self.coords)
+        self.n = n
+        self.leaf_size = leaf_size
+        self.lo = self.coords.min(axis=0)
+        extent = self.coords.max(axis=0) - self.lo
+        cells = max(1.0, n / leaf_size)
+        if extent.min() > 0:
+            cell = math.sqrt(extent[0] * extent[1] / cells)
+        else:
+            cell = extent.max() / cells  # puntos alineados
+        self.cell = cell if cell > 0 else 1.0
+        self.shape = (extent // self.cell).astype(np.int64) + 1
+
+        cx, cy = self._cells(self.coords)
+        cell_id = cx * self.shape[1] + cy
+        self.order = np.argsort(cell_id, kind='stable')  # puntos ordenados por celda
+        # Los puntos de la celda c son order[start[c]:start[c+1]]
+        self.start = np.searchsorted(cell_id[self.order],
+                                     np.arange(self.shape[0] * self.shape[1] + 1))
+
+    def _cells(self, points: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Celda (x, y) de cada punto (los puntos de afuera van al borde)."""
+        c = np.floor((points - self.lo) / self.cell).astype(np.int64)
+        return (np.clip(c[:, 0], 0, self.shape[0] - 1),
+                np.clip(c[:, 1], 0, self.shape[1] - 1))
+
+    def _gather(self, qx: np.ndarray, qy: np.ndarray,
+                r: int) -> tuple[np.ndarray, np.ndarray]:
+        """Puntos de las celdas a distancia a lo sumo r de la celda de cada consulta.
+
+        Retorna dos arreglos del mismo largo: la consulta (su indice en qx) y
+        el punto de cada par.
+        """
+        offsets = np.arange(-r, r + 1)
+        cx = qx[:, None, None] + offsets[None, :, None]
+        cy = qy[:, None, None] + offsets[None, None, :]
+        valid = ((cx >= 0) & (cx < self.shape[0])) & ((cy >= 0) & (cy < self.shape[1]))
+        q, cx, cy = np.nonzero(valid)
+        cid = (qx[q] + offsets[cx]) * self.shape[1] + (qy[q] + offsets[cy])
+        first = self.start[cid]
+        count = self.start[cid + 1] - first
+        total = count.sum()
+        # Indices order[first:first+count] de cada celda, concatenados
+        shift = np.repeat(first - (np.cumsum(count) - count), count)
+        return np.repeat(q, count), self.order[shift + np.arange(total)]
+
+    def knn(self, points: np.ndarray, k: int, skip: np.ndarray | None = None,
+            mask: np.ndarray | None = None) -> np.ndarray:
+        """Determina los k puntos mas cercanos a cada consulta.
+
+        Argumentos:
+        ==========
+        points: np.ndarray
+            matriz (m, 2) con las coordenadas de cada consulta
+        k: int
+            cantidad de vecinos
+        skip: np.ndarray | None
+            arreglo (m,) con un punto que se excluye de cada consulta (por
+            ejemplo la propia ciudad)
+        mask: np.ndarray | None
+            arreglo (n,) de booleanos; solo se consideran los puntos en True
+
+        Retorno:
+        =======
+        neighbours: np.ndarray
+            matriz (m, k) de indices, de mas cercano a mas lejano; si hay
+            menos de k puntos validos, las posiciones que faltan quedan en -1
+        """
+        points = np.asarray(points, dtype=np.float64)
+        m = len(points)
+        result = np.full((m, k), -1, dtype=np.int64)
+        if m == 0 or k == 0:
+            return result
+        qx, qy = self._cells(points)
+        pending = np.arange(m)
+        # Radio inicial (en celdas) del circulo que contiene en promedio k puntos
+        r = max(1, math.ceil(math.sqrt(k / (self.leaf_size * math.pi))))
+        while len(pending):
+            chunk = max(1, int(BATCH_PAIRS // ((2 * r + 1) ** 2 * self.leaf_size)))
+            done = []
+            for s in range(0, len(pending), chunk):
+                idx = pending[s:s + chunk]
+                done.append(self._knn_block(points, idx, qx[idx], qy[idx], r, k,
+                                            skip, mask, result))
+            pending = pending[~np.concatenate(done)]
+            r = 2 * r + 1
+        return result
+
+    def _knn_block(self, points: np.ndarray, idx: np.ndarray, qx: np.ndarray,
+                   qy: np.ndarray, r: int, k: int, skip: np.ndarray | None,
+                   mask: np.ndarray | None, result: np.ndarray) -> np.ndarray:
+        """Resuelve las consultas idx mirando las celdas a distancia r.
+
+        Escribe en result las que quedan resueltas y retorna un arreglo de
+        booleanos que indica cuales son.
+        """
+        q, pts = self._gather(qx, qy, r)
+        keep = np.ones(len(q), dtype=bool)
+        if skip is not None:
+            keep &= pts != skip[idx[q]]
+        if mask is not None:
+            keep &= mask[pts]
+        q, pts = q[keep], pts[keep]
+        diff = self.coords[pts] - points[idx[q]]
+        d = np.einsum('ij,ij->i', diff, diff)
+
+        # Pasar los candidatos a una matriz con una fila por consulta (q ya
+        # viene ordenado) y ordenar cada fila por distancia e indice
+        m = len(idx)
+        counts = np.bincount(q, minlength=m)
+        col = np.arange(len(q)) - np.repeat(np.cumsum(counts) - counts, counts)
+        width = max(k, counts.max(initial=0))
+        D = np.full((m, width), np.inf)
+        I = np.full((m, width), self.n, dtype=np.int64)
+        D[q, col] = d
+        I[q, col] = pts
+        order = np.lexsort((I, D), axis=1)[:, :k]
+        D = np.take_along_axis(D, order, axis=1)
+        I = np.take_along_axis(I, order, axis=1)
+        found = np.minimum(counts, k)
+
+        # El bloque revisado cubre todo lo que esta a menos de bound de la
+        # consulta; si el k-esimo esta dentro de esa distancia, es exacto
+        px, py = points[idx, 0] - self.lo[0], points[idx, 1] - self.lo[1]
+        bound = np.minimum.reduce([px - (qx - r) * self.cell,
+                                   (qx + r + 1) * self.cell - px,
+                                   py - (qy - r) * self.cell,
+                                   (qy + r + 1) * self.cell - py])
+        kth = D[np.arange(m), np.maximum(found - 1, 0)]
+        whole = ((qx - r <= 0) & (qx + r >= self.shape[0] - 1)
+                 & (qy - r <= 0) & (qy + r >= self.shape[1] - 1))
+        solved = whole | ((counts >= k) & (kth <= np.maximum(bound, 0) ** 2))
+
+        I[I == self.n] = -1
+        result[idx[solved]] = I[solved]
+        return solved
+
+    def radius(self, points: np.ndarray, radius: float,
+               skip: np.ndarray | None = None) -> list[np.ndarray]:
+        """Determina los puntos a distancia a lo sumo radius de cada consulta.
+
+        Argumentos:
+        ==========
+        points: np.ndarray
+            matriz (m, 2) con las coordenadas de cada consulta
+        radius: float
+            radio de busqueda
+        skip: np.ndarray | None
+            arreglo (m,) con un punto que se excluye de cada consulta
+
+        Retorno:
+        =======
+        neighbours: list[np.ndarray]
+            para cada consulta, los indices de los puntos, de mas cercano a
+            mas lejano
+        """
+        points = np.asarray(points, dtype=np.float64)
+        m = len(points)
+        qx, qy = self._cells(points)
+        # Un punto a distancia radius esta a lo sumo a r celdas; si la
+        # consulta esta afuera de la grilla se revisa toda
+        inside = np.all((points >= self.lo)
+                        & (points <= self.lo + self.shape * self.cell), axis=1)
+        r = int(radius // self.cell) + 1
+        if not inside.all():
+            r = max(r, int(self.shape.max()))
+        chunk = max(1, int(BATCH_PAIRS // ((2 * r + 1) ** 2 * self.leaf_size)))
+        result = []
+        for s in range(0, m, chunk):
+            idx = np.arange(s, min(s + chunk, m))
+            q, pts = self._gather(qx[idx], qy[idx], r)
+            diff = self.coords[pts] - points[idx[q]]
+            d = np.einsum('ij,ij->i', diff, diff)
+            keep = d <= radius * radius
+            if skip is not None:
+                keep &= pts != skip[idx[q]]
+            q, pts, d = q[keep], pts[keep], d[keep]
+            order = np.lexsort((pts, d, q))
+            q, pts = q[order], pts[order]
+            bounds = np.searchsorted(q, np.arange(len(idx) + 1))
+            result.extend(pts[bounds[i]:bounds[i + 1]] for i in range(len(idx)))
+        return result
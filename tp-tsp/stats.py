@@ -0,0 +1,146 @@
+"""Este modulo define la clase Stats.
+
+Stats reune las estadisticas de una ejecucion de un algoritmo de busqueda
+local: cuantas veces se llamo a cada metodo del problema, cuantos sucesores
+se evaluaron, cuanto tiempo se paso evaluando el vecindario y cuanto en el
+resto del algoritmo (aplicar movimientos, listas tabu, copias, etc.), y
+opcionalmente el pico de memoria.
+
+La medicion se hace con instrument(), que reemplaza temporalmente los
+metodos del problema por sondas que cuentan y cronometran las llamadas.
+Fuera de instrument() el problema no se modifica, por lo que las
+estadisticas no tienen ningun costo cuando no se usan (ver
+LocalSearch.profile()).
+
+LinKernighan evalua sus cadenas de movimientos sin pasar por los metodos
+del problema: sus evaluaciones se cuentan, pero su tiempo queda como
+tiempo de resto.
+
+Solo se mide el proceso principal: el trabajo de los procesos auxiliares
+(HillClimbingReset y GeneticAlgorithm con workers > 1) no se cuenta.
+"""
+
+from __future__ import annotations
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Iterator
+
+# Metodos del problema que se cuentan, y si su tiempo es de evaluacion
+PROBES = {"max_action": True, "first_action": True, "delta": True,
+          "obj_val": True, "batch_obj_val": True, "result": False,
+          "apply": False}
+
+
+class Stats:
+    """Estadisticas de una ejecucion de un algoritmo de busqueda local."""
+
+    def __init__(self) -> None:
+        """Construye estadisticas vacias."""
+        self.calls = dict.fromkeys(PROBES, 0)  # llamadas a cada metodo
+        self.evaluations = 0  # sucesores (o estados) evaluados
+        self.iterations = 0  # iteraciones del algoritmo
+        self.total_time = 0.0  # tiempo total en segundos
+        self.eval_time = 0.0  # tiempo evaluando en segundos
+        self.peak_memory = None  # pico de memoria en bytes (si se midio)
+        self._depth = 0  # llamadas de evaluacion anidadas en curso
+
+    @property
+    def bookkeeping_time(self) -> float:
+        """Tiempo fuera de la evaluacion de sucesores, en segundos."""
+        return max(self.total_time - self.eval_time, 0.0)
+
+    @property
+    def evals_per_sec(self) -> float | None:
+        """Sucesores evaluados por segundo de evaluacion."""
+        if self.eval_time <= 0:
+            return None
+        return self.evaluations / self.eval_time
+
+    def as_dict(self) -> dict:
+        """Devuelve las estadisticas como diccionario (por ejemplo, para JSON)."""
+        return {"calls": dict(self.calls),
+                "evaluations": self.evaluations,
+                "iterations": self.iterations,
+                "total_time": self.total_time,
+                "eval_time": self.eval_time,
+                "bookkeeping_time": self.bookkeeping_time,
+                "evals_per_sec": self.evals_per_sec,
+                "peak_memory": self.peak_memory}
+
+    def __str__(self) -> str:
+        """Resumen de las estadisticas en una linea."""
+        calls = " ".join(f"{name}={count}" for name, count in self.calls.items() if count)
+        text = (f"evals={self.evaluations} eval={self.eval_time:.3f}s "
+                f"resto={self.bookkeeping_time:.3f}s {calls}")
+        if self.peak_memory is not None:
+            text += f" mem={self.peak_memory / 2**20:.1f}MiB"
+        return text
+
+
+class _Probe:
+    """Reemplazo de un metodo del problema que cuenta y cronometra sus llamadas.
+
+    Guarda la funcion de la clase y no el metodo ligado, para que el problema
+    se pueda copiar y serializar mientras esta instrumentado.
+    """
+
+    def __init__(self, problem, name: str, stats: Stats) -> None:
+        self.problem = problem
+        self.name = name
+        self.func = getattr(type(problem), name)
+        self.timed = PROBES[name]
+        self.stats = stats
+
+    def __call__(self, *args, **kwargs):
+        stats = self.stats
+        stats.calls[self.name] += 1
+        if self.name == "delta":
+            stats.evaluations += 1
+        elif self.name == "batch_obj_val":
+            stats.evaluations += len(args[0])
+        # Las llamadas anidadas (obj_val dentro de max_action) no se cronometran
+        if not self.timed or stats._depth:
+            return self.func(self.problem, *args, **kwargs)
+        stats._depth += 1
+        start = perf_counter()
+        try:
+            return self.func(self.problem, *args, **kwargs)
+        finally:
+            stats.eval_time += perf_counter() - start
+            stats._depth -= 1
+
+
+@contextmanager
+def instrument(problem, stats: Stats, memory: bool = False) -> Iterator[Stats]:
+    """Mide en stats las llamadas a los metodos de problem dentro del bloque with.
+
+    Argumentos:
+    ==========
+    problem: OptProblem
+        problema a instrumentar (se restaura al salir del bloque)
+    stats: Stats
+        estadisticas donde se acumulan las mediciones
+    memory: bool
+        si es True se mide el pico de memoria con tracemalloc, lo que hace
+        bastante mas lenta la ejecucion
+    """
+    names = [name for name in PROBES if hasattr(type(problem), name)]
+    for name in names:
+        setattr(problem, name, _Probe(problem, name, stats))
+    evaluations = getattr(problem, "evaluations", 0)
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    elif memory:
+        tracemalloc.reset_peak()
+    try:
+        yield stats
+    finally:
+        if memory:
+            stats.peak_memory = tracemalloc.get_traced_memory()[1]
+        if tracing:
+            tracemalloc.stop()
+        stats.evaluations += getattr(problem, "evaluations", 0) - evaluations
+        for name in names:
+            delattr(problem, name)
@@ -0,0 +1,66 @@
+"""Este modulo define la clase TabuList.
+
+TabuList representa la memoria de la busqueda tabu: las ultimas acciones
+realizadas, que no se pueden volver a elegir mientras permanezcan en ella.
+
+Se implementa como un buffer circular de capacidad fija junto con un
+diccionario de ocurrencias, de modo que tanto la pertenencia como el
+agregado (con el desalojo de la accion mas vieja) cuestan O(1).
+"""
+
+from __future__ import annotations
+from typing import Hashable, Iterator
+
+
+class TabuList:
+    """Lista tabu acotada con pertenencia en tiempo constante."""
+
+    def __init__(self, capacity: int) -> None:
+        """Construye una lista tabu vacia.
+
+        Argumentos:
+        ==========
+        capacity: int
+            cantidad maxima de acciones tabu (tenencia)
+        """
+        self.capacity = capacity
+        self._buffer = [None] * capacity  # buffer circular
+        self._head = 0  # posicion de la accion mas vieja
+        self._size = 0
+        self._count = {}  # accion -> cantidad de apariciones en el buffer
+
+    def add(self, action: Hashable) -> None:
+        """Agrega una accion. Si la lista esta llena se desaloja la mas vieja."""
+        if self.capacity <= 0:
+            return
+        if self._size == self.capacity:
+            old = self._buffer[self._head]
+            self._count[old] -= 1
+            if self._count[old] == 0:
+                del self._count[old]
+            self._buffer[self._head] = action
+            self._head = (self._head + 1) % self.capacity
+        else:
+            self._buffer[(self._head + self._size) % self.capacity] = action
+            self._size += 1
+        self._count[action] = self._count.get(action, 0) + 1
+
+    def clear(self) -> None:
+        """Vacia la lista tabu."""
+        self._buffer = [None] * self.capacity
+        self._head = 0
+        self._size = 0
+        self._count = {}
+
+    def __contains__(self, action: Hashable) -> bool:
+        """Determina si una accion es tabu."""
+        return action in self._count
+
+    def __len__(self) -> int:
+        """Cantidad de acciones en la lista."""
+        return self._size
+
+    def __iter__(self) -> Iterator[Hashable]:
+        """Recorre las acciones de la mas vieja a la mas nueva."""
+        for k in range(self._size):
+            yield self._buffer[(self._head + k) % self.capacity]
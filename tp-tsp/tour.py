@@ -0,0 +1,123 @@
+"""Este modulo define la clase Tour.
+
+Tour es una representacion compacta y mutable de un estado del TSP. Guarda
+el recorrido en un arreglo de numpy de tipo int32 de largo n+1, donde la
+ultima posicion repite a la primera (igual que en la representacion con
+listas), junto con la posicion de cada ciudad.
+
+Los movimientos se aplican en el lugar. Por defecto se aplican igual que
+TSP.result(): solo se mueven las ciudades de los segmentos de la accion y
+las demas conservan su posicion, por lo que los algoritmos que eligen o
+recuerdan acciones por posicion dan los mismos resultados que con listas.
+
+Con shortest=True se aprovecha que invertir el segmento [v_i+1,...,v_j]
+da el mismo tour ciclico que invertir su complemento [v_j+1,...,v_i], y
+siempre se invierte el mas corto de los dos. Del mismo modo, al
+intercambiar dos segmentos consecutivos (Or-opt y 3-opt) se deja fijo el
+mas largo de los tres segmentos del tour. En ese caso cambian las
+posiciones de las demas ciudades (y la primera ciudad del arreglo puede
+dejar de ser la 0), por lo que solo conviene en algoritmos que eligen los
+movimientos por ciudad; tolist() devuelve el tour normalizado para que
+empiece y termine en 0.
+"""
+
+from __future__ import annotations
+import numpy as np
+
+
+class Tour:
+    """Tour del TSP sobre un arreglo int32, con inversion de segmentos en el lugar."""
+
+    def __init__(self, state: list[int], shortest: bool = False) -> None:
+        """Construye un tour a partir de un estado.
+
+        Argumentos:
+        ==========
+        state: list[int]
+            un estado [v_0,...,v_n] con v_n = v_0
+        shortest: bool
+            si es True, los movimientos mueven los segmentos mas cortos
+            aunque cambien las posiciones de las demas ciudades
+        """
+        self.shortest = shortest
+        self.order = np.array(state, dtype=np.int32)
+        self.n = len(self.order) - 1
+        self.pos = np.empty(self.n, dtype=np.int32)  # pos[v] = posicion de la ciudad v
+        self.pos[self.order[:-1]] = np.arange(self.n, dtype=np.int32)
+
+    def reverse(self, i: int, j: int) -> None:
+        """Aplica la accion 2-opt (i,j) en el lugar.
+
+        Invierte [v_i+1,...,v_j] o, con shortest y si es mas corto, el
+        complemento [v_j+1,...,v_i] (con indices modulo n).
+        """
+        n = self.n
+        order = self.order
+        if not self.shortest or j - i <= n - (j - i):
+            order[i + 1:j + 1] = order[i + 1:j + 1][::-1]
+            self.pos[order[i + 1:j + 1]] = np.arange(i + 1, j + 1, dtype=np.int32)
+        else:
+            idx = np.arange(j + 1, i + n + 1, dtype=np.int32) % n
+            seg = order[idx][::-1]
+            order[idx] = seg
+            self.pos[seg] = idx
+            order[n] = order[0]
+
+    def exchange(self, i: int, j: int, k: int) -> None:
+        """Aplica la accion (i,j,k) en el lugar.
+
+        Intercambia los segmentos [v_i+1,...,v_j] y [v_j+1,...,v_k]. Con
+        shortest, como rotar los tres segmentos da el mismo tour ciclico, se
+        mueven los dos mas cortos y el mas largo queda en su lugar.
+        """
+        n = self.n
+        order = self.order
+        lengths = (j - i, k - j, n - (k - i))
+        longest = lengths.index(max(lengths)) if self.shortest else 2
+        if longest == 2:
+            a, b, c = i, j, k
+        elif longest == 0:
+            a, b, c = j, k, i + n
+        else:
+            a, b, c = k, i + n, j + n
+        idx = np.arange(a + 1, c + 1, dtype=np.int32) % n
+        seg = order[idx]
+        m = b - a
+        seg = np.concatenate((seg[m:], seg[:m]))
+        order[idx] = seg
+        self.pos[seg] = idx
+        order[n] = order[0]
+
+    def copy(self) -> Tour:
+        """Devuelve una copia del tour."""
+        other = Tour.__new__(Tour)
+        other.shortest = self.shortest
+        other.order = self.order.copy()
+        other.n = self.n
+        other.pos = self.pos.copy()
+        return other
+
+    def tolist(self) -> list[int]:
+        """Devuelve el estado como lista, empezando y terminando en la ciudad 0."""
+        k = int(self.pos[0])
+        return self.order[k:self.n].tolist() + self.order[:k + 1].tolist()
+
+    def __len__(self) -> int:
+        """Largo del estado (n+1, igual que la lista equivalente)."""
+        return self.n + 1
+
+    def __getitem__(self, key):
+        """Ciudad en una posicion (o arreglo de ciudades si key es un slice)."""
+        if isinstance(key, slice):
+            return self.order[key]
+        return int(self.order[key])
+
+    def __iter__(self):
+        """Recorre las ciudades del tour, incluida la repeticion final."""
+        return iter(self.order.tolist())
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        """Permite usar el tour donde se espera un arreglo de numpy."""
+        if dtype is None:
+            return self.order
+        return self.order.astype(dtype)